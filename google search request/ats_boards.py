@@ -0,0 +1,220 @@
+import asyncio
+import html
+import json
+import logging
+import os
+import re
+import sys
+import time
+
+import aiohttp
+from bs4 import BeautifulSoup
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from helpers.async_api_helper import async_requests_get
+from helpers.concurrency import AsyncAdaptiveLimiter
+from helpers.runtime import configure, save_listings
+from helpers.validation import extract_compensation, determine_currency
+
+logger = logging.getLogger(__name__)
+
+EMPLOYERS_FILE = os.path.join(os.path.dirname(__file__), '..', 'jboard request', 'employers.json')
+
+# Public board-listing endpoints; each returns every open posting for a company in one response
+BOARD_URLS = {
+    'greenhouse': 'https://boards-api.greenhouse.io/v1/boards/{token}/jobs?content=true',
+    'lever': 'https://api.lever.co/v0/postings/{token}?mode=json',
+    'ashby': 'https://api.ashbyhq.com/posting-api/job-board/{token}?includeCompensation=true',
+}
+
+# Re-probe employers that had no board after this long, in case they switched ATS
+NOT_FOUND_TTL = 7 * 24 * 3600
+
+
+def board_tokens(company_name):
+    """Likely board tokens for a company, e.g. "Included Health" -> includedhealth, included-health."""
+    words = re.findall(r'[a-z0-9]+', company_name.lower())
+    return list(dict.fromkeys([''.join(words), '-'.join(words)]))
+
+
+def html_to_text(content):
+    return BeautifulSoup(html.unescape(content or ''), 'html.parser').get_text(separator=' ', strip=True)
+
+
+def parse_greenhouse(company, payload):
+    jobs = []
+    for job in payload.get('jobs', []):
+        description = html_to_text(job.get('content'))
+        jobs.append({
+            "Title": job.get('title', 'N/A'),
+            "Link": job.get('absolute_url', ''),
+            "Company": company,
+            "Location": (job.get('location') or {}).get('name') or 'N/A',
+            "Description": description,
+            "Compensation": extract_compensation(description),
+        })
+    return jobs
+
+
+def parse_lever(company, payload):
+    jobs = []
+    for job in payload:
+        description = job.get('descriptionPlain') or html_to_text(job.get('description'))
+        salary = job.get('salaryRange') or {}
+        if salary.get('min') is not None:
+            compensation = f"{salary['min']:,} - {salary.get('max') or salary['min']:,} {salary.get('interval') or ''}".strip()
+        else:
+            compensation = extract_compensation(description)
+        record = {
+            "Title": job.get('text', 'N/A'),
+            "Link": job.get('hostedUrl', ''),
+            "Company": company,
+            "Location": (job.get('categories') or {}).get('location') or 'N/A',
+            "Description": description,
+            "Compensation": compensation,
+        }
+        if salary.get('currency'):
+            record["Compensation Currency"] = salary['currency']
+        jobs.append(record)
+    return jobs
+
+
+def parse_ashby(company, payload):
+    jobs = []
+    for job in payload.get('jobs', []):
+        description = job.get('descriptionPlain') or html_to_text(job.get('descriptionHtml'))
+        summary = (job.get('compensation') or {}).get('compensationTierSummary')
+        jobs.append({
+            "Title": job.get('title', 'N/A'),
+            "Link": job.get('jobUrl', ''),
+            "Company": company,
+            "Location": job.get('location') or 'N/A',
+            "Description": description,
+            "Compensation": summary or extract_compensation(description),
+        })
+    return jobs
+
+
+PARSERS = {'greenhouse': parse_greenhouse, 'lever': parse_lever, 'ashby': parse_ashby}
+
+
+class ATSBoardIngestor:
+    """
+    Pull every open posting straight from each employer's ATS board.
+
+    Each employer in employers.json is resolved once to a (platform, token)
+    board by probing the Greenhouse, Lever and Ashby listing endpoints; the
+    result, including "no board found", is cached on disk. Boards are then
+    fetched concurrently, one request per employer.
+    """
+
+    def __init__(self, employers_file=EMPLOYERS_FILE, cache_file=None, concurrency=20):
+        self.employers_file = employers_file
+        self.cache_file = cache_file or os.getenv('ATS_BOARD_CACHE', 'ats_boards_cache.json')
+        self.concurrency = concurrency
+        self.cache = self._load_json(self.cache_file, {})
+
+    @staticmethod
+    def _load_json(path, default):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return default
+
+    def _save_cache(self):
+        with open(self.cache_file, 'w') as f:
+            json.dump(self.cache, f, indent=2)
+
+    async def _fetch_board(self, session, limiter, platform, token):
+        """Return the raw board payload, or None if the board doesn't exist."""
+        url = BOARD_URLS[platform].format(token=token)
+        response = await async_requests_get(session, url, limiter=limiter, deadline=30)
+        if response.status_code != 200:
+            return None
+        payload = response.json()
+        # Some endpoints answer unknown boards with 200 and an error body
+        if isinstance(payload, dict) and 'jobs' not in payload:
+            return None
+        return payload
+
+    async def _resolve_and_fetch(self, session, limiter, company):
+        cached = self.cache.get(company)
+        if cached and cached.get('platform'):
+            candidates = [(cached['platform'], cached['token'])]
+        elif cached and time.time() - cached.get('checked_at', 0) < NOT_FOUND_TTL:
+            return []
+        else:
+            candidates = [(platform, token) for platform in BOARD_URLS for token in board_tokens(company)]
+
+        unreachable = False
+        for platform, token in candidates:
+            try:
+                payload = await self._fetch_board(session, limiter, platform, token)
+            except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+                logger.warning(f"⚠️ {platform} board {token} unreachable: {e}")
+                unreachable = True
+                continue
+            if payload is not None:
+                self.cache[company] = {'platform': platform, 'token': token, 'checked_at': time.time()}
+                return PARSERS[platform](company, payload)
+
+        # Only remember "no board" when every probe got a real answer
+        if not unreachable:
+            self.cache[company] = {'platform': None, 'token': None, 'checked_at': time.time()}
+        return []
+
+    async def ingest_async(self):
+        employers = self._load_json(self.employers_file, {})
+        limiter = AsyncAdaptiveLimiter(initial=self.concurrency, max_limit=self.concurrency * 2)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(company):
+            async with semaphore:
+                try:
+                    return await self._resolve_and_fetch(session, limiter, company)
+                except Exception as e:
+                    logger.error(f"❌ Board ingestion failed for {company}: {e}")
+                    return []
+
+        async with aiohttp.ClientSession() as session:
+            boards = await asyncio.gather(*(run(company) for company in employers))
+        self._save_cache()
+
+        job_results = []
+        for company, jobs in zip(employers, boards):
+            for job in jobs:
+                if not job['Link']:
+                    continue
+                if "Compensation Currency" not in job:
+                    job["Compensation Currency"] = determine_currency(job['Compensation'], '') if job['Compensation'] != 'N/A' else 'N/A'
+                job_results.append(job)
+            if jobs:
+                logger.info(f"🏢 {company}: {len(jobs)} open postings via {self.cache[company]['platform']}")
+        return job_results
+
+    def ingest(self):
+        return asyncio.run(self.ingest_async())
+
+
+def search_ats_boards():
+    """Ingestion source alongside search_jobs: every open posting for every known employer."""
+    job_results = ATSBoardIngestor().ingest()
+    logger.info(f"📊 Total postings pulled from ATS boards: {len(job_results)}")
+    return job_results
+
+
+def main():
+    configure()
+    try:
+        logger.info("🚀 Starting ATS board ingestion...")
+        job_results = search_ats_boards()
+        # ATS records carry Company/Location/Description/Compensation, so they go to the enriched listings table
+        save_listings(job_results)
+        logger.info(f"✨ Completed! Pulled {len(job_results)} postings")
+    except Exception as e:
+        logger.error(f"❌ Error in main execution: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,78 @@
+import argparse
 import time
 import logging
 import os
-from dotenv import load_dotenv
-from pyairtable import Api
-from helpers.api_helper import custom_requests_get
+from helpers.api_helper import custom_requests_get, DEFAULT_LIMITER
+from helpers.profiling import Profiler, add_profile_args
+from helpers.runtime import configure, save_listings
+from helpers.watermarks import WatermarkStore
 import json
+from datetime import datetime, timezone
 
-api = Api(os.getenv('AIR_TABLE_API', 'default_value'))
-table = api.table('app816KaoBp3EZKwg','tblLbE2xSdrbR26ve')
+AIRTABLE_BASE_ID = 'app816KaoBp3EZKwg'
+AIRTABLE_TABLE_ID = 'tblLbE2xSdrbR26ve'
 
-load_dotenv()
-
-logging.basicConfig(
-    level=getattr(logging, os.getenv('LOG_LEVEL', 'INFO')),
-    format='%(asctime)s - %(message)s',
-    datefmt='%H:%M:%S'
-)
 logger = logging.getLogger(__name__)
 
+DAILY_QUOTA_REASONS = {'dailyLimitExceeded', 'quotaExceeded'}
+
+
+def quota_error(response):
+    """
+    'daily' if a CSE response says the key's daily quota is spent, 'rate' for
+    a per-minute limit, None for anything else.
+    """
+    if response.status_code not in (403, 429):
+        return None
+    try:
+        error = response.json().get('error', {})
+    except ValueError:
+        error = {}
+    reasons = {detail.get('reason') for detail in error.get('errors', [])}
+    if reasons & DAILY_QUOTA_REASONS or 'per day' in error.get('message', '').lower():
+        return 'daily'
+    if response.status_code == 429 or reasons & {'rateLimitExceeded', 'userRateLimitExceeded'}:
+        return 'rate'
+    return None
+
 
+def search_jobs(api_key=None, search_engine_id=None, max_results=400, delta=None, job_sites=None, stats=None,
+                output_file='job_listings.json', watermarks=None):
+    """
+    Page Google CSE results for every configured site (or just `job_sites`).
 
-def search_jobs(api_key=None, search_engine_id=None, max_results=400):
+    In delta mode (`delta=True` or SEARCH_MODE=delta) each query is limited to
+    results since its stored watermark, sorted by date, and paging stops at
+    the first page that only returns links seen in earlier runs. Watermarks
+    are only written once the results they cover are: when a `watermarks`
+    store is passed, the caller saves it after storing the results;
+    otherwise they are saved right after `output_file` is written.
+
+    If a `stats` dict is passed, the number of CSE requests made is added to
+    stats['queries'] so callers can account for daily quota. A query that
+    stops on an error response sets stats['http_error'] to its status code;
+    when the key runs out of quota the search stops and stats['quota_error']
+    is set to 'daily' or 'rate' (see quota_error).
+
+    Results are written to `output_file` unless it is None.
+    """
     api_key = api_key or os.getenv('GOOGLE_API_KEY')
     search_engine_id = search_engine_id or os.getenv('GOOGLE_SEARCH_ENGINE_ID')
     max_results = int(os.getenv('MAX_RESULTS', max_results))
+    if delta is None:
+        delta = os.getenv('SEARCH_MODE', 'full').lower() == 'delta'
     
-    job_sites = os.getenv('JOB_SITES', '').split(',')
+    job_sites = job_sites or os.getenv('JOB_SITES', '').split(',')
     locations = os.getenv('LOCATIONS', '').split(',')
     roles = os.getenv('JOB_ROLES', '').split(',')
     
     job_results = []
     unique_links = set()
+    owns_watermarks = watermarks is None
+    if delta and owns_watermarks:
+        watermarks = WatermarkStore()
+    run_started = datetime.now(timezone.utc)
+    exhausted = None
     
     for site in job_sites:
         site = site.strip()
@@ -43,6 +85,12 @@ def search_jobs(api_key=None, search_engine_id=None, max_results=400):
         # Combined query for broader search
         query = f'site:{site} ({location_query}) ({role_query})'
         logger.info(f"🔍 Broad query: {query}")
+
+        watermark_key = WatermarkStore.key(site, roles, locations)
+        known_links = watermarks.known_links(watermark_key) if delta else set()
+        delta_params = watermarks.search_params(watermark_key, now=run_started) if delta else {}
+        site_links = []
+        complete = False
         
         start_index = 1
         while len(job_results) < max_results and start_index <= 100:
@@ -51,12 +99,18 @@ def search_jobs(api_key=None, search_engine_id=None, max_results=400):
                 'key': api_key,
                 'cx': search_engine_id,
                 'num': 10,
-                'start': start_index
+                'start': start_index,
+                **delta_params
             }
             
             response = custom_requests_get("https://www.googleapis.com/customsearch/v1", params=params)
+            if stats is not None:
+                stats['queries'] = stats.get('queries', 0) + 1
             
             if response.status_code != 200:
+                exhausted = quota_error(response)
+                if stats is not None:
+                    stats['http_error'] = response.status_code
                 logger.error(f"❌ Error {response.status_code} for query: {query}")
                 break
             
@@ -64,15 +118,23 @@ def search_jobs(api_key=None, search_engine_id=None, max_results=400):
             items = results.get('items', [])
             
             if not items:
+                complete = True
+                break
+
+            page_links = [item.get('link', '') for item in items]
+            if delta and all(link in known_links for link in page_links if link):
+                logger.info(f"⏹️ Only known links on page {start_index // 10 + 1}, stopping delta crawl of {site}")
+                complete = True
                 break
             
             for item in items:
                 link = item.get('link', '')
                 
-                if not link or link in unique_links:
+                if not link or link in unique_links or link in known_links:
                     continue
                 
                 unique_links.add(link)
+                site_links.append(link)
                 job_results.append({
                     "Title": item.get('title', 'N/A'),
                     "Link": link,
@@ -80,54 +142,74 @@ def search_jobs(api_key=None, search_engine_id=None, max_results=400):
   #TODO: Modify snippet so that it grabs all the description
   #TODO: Get compensation if existing
   #TODO: Get location
-  #TODO: Set a sync time of once as week
   #TODO: Review the pages I want to query for
                 })
                 
                 if len(job_results) >= max_results:
                     logger.info(f"✅ Reached maximum results limit: {max_results}")
-                    return job_results[:max_results]
+                    if delta:
+                        watermarks.update(watermark_key, site_links, run_started, complete=False)
+                    return _write_results(job_results[:max_results], output_file,
+                                          watermarks if delta and owns_watermarks else None)
             
             start_index += 10
             time.sleep(1) 
+        else:
+            complete = start_index > 100
+
+        if delta:
+            watermarks.update(watermark_key, site_links, run_started, complete=complete)
+
+        if exhausted:
+            logger.error(f"⛽ API key out of {exhausted} quota, stopping search")
+            if stats is not None:
+                stats['quota_error'] = exhausted
+            break
 
-    file_path = 'job_listings.json' 
+    return _write_results(job_results, output_file, watermarks if delta and owns_watermarks else None)
 
-    with open(file_path, "w") as f:
-        json.dump(job_results, f, indent=4)
 
+def _write_results(job_results, output_file, watermarks=None):
+    """
+    Write the results for the enrich/save stages (unless output_file is None),
+    then the watermarks that depend on them, and return the results.
+    """
     logger.info(f"📊 Total unique job results found: {len(job_results)}")
-    logger.info(f"💾 Saved results to {file_path}")
+    if output_file:
+        with open(output_file, "w") as f:
+            json.dump(job_results, f, indent=4)
+        logger.info(f"💾 Saved results to {output_file}")
+    if watermarks is not None:
+        watermarks.save()
+    return job_results
 
 
 def save_to_airtable(data):
-    try:
-        existing_records = table.all()
-        existing_links = {record['fields'].get('Link') for record in existing_records}
-        
-        new_jobs = [job for job in data if job['Link'] not in existing_links]
-        
-        if new_jobs:
-            chunk_size = 10
-            for i in range(0, len(new_jobs), chunk_size):
-                chunk = new_jobs[i:i + chunk_size]
-                table.batch_create(chunk)
-                time.sleep(0.5)
-            logger.info(f"✅ Saved {len(new_jobs)} new job listings to Airtable")
-        else:
-            logger.info("ℹ️ No new job listings to save")
-            
-    except Exception as e:
-        logger.error(f"❌ Error saving to Airtable: {e}")
+    """Add new jobs to the local store; the background sync pushes them to Airtable. Returns whether they were stored."""
+    return save_listings(data, AIRTABLE_BASE_ID, AIRTABLE_TABLE_ID)
 
 def main():
+    configure()
+    parser = argparse.ArgumentParser(description="Search for job listings and save them to Airtable")
+    add_profile_args(parser)
+    args = parser.parse_args()
+    profiler = Profiler.from_args(args)
+
     try:
         logger.info("🚀 Starting job search...")
-        job_results = search_jobs()
-        save_to_airtable(job_results)
+        # Delta watermarks are kept back until the results are safely in the store
+        watermarks = WatermarkStore()
+        with profiler.stage('search'):
+            job_results = search_jobs(watermarks=watermarks)
+        with profiler.stage('save'):
+            if save_to_airtable(job_results):
+                watermarks.save()
         logger.info(f"✨ Completed! Found {len(job_results)} unique job listings")
+        DEFAULT_LIMITER.log_metrics()
     except Exception as e:
         logger.error(f"❌ Error in main execution: {e}")
+    finally:
+        profiler.report()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
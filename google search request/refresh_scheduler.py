@@ -0,0 +1,225 @@
+import argparse
+import logging
+import os
+import signal
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from google_search_json_api import search_jobs, save_to_airtable
+from helpers.runtime import configure
+from helpers.watermarks import WatermarkStore
+
+logger = logging.getLogger(__name__)
+
+HOUR = 3600
+
+
+class RefreshScheduler:
+    """
+    Long-running scheduler that refreshes each site query on its own interval.
+
+    The queue lives in SQLite so intervals and yield history survive restarts.
+    After each run a site's interval is re-derived from its observed rate of
+    new postings: the next run is timed to find roughly TARGET_NEW_PER_RUN new
+    postings, clamped between the min and max interval. Hot sites are
+    therefore refreshed often and dead ones rarely. A site's first run only
+    records a baseline, and failed runs leave its history untouched. All
+    runs share a daily CSE query budget; when it is nearly spent (or the key
+    reports its daily quota is gone), due sites wait for the next UTC day,
+    and the hottest sites are served first.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.getenv('SCHEDULER_DB', 'refresh_scheduler.db')
+        self.daily_quota = int(os.getenv('DAILY_QUERY_QUOTA', 100))
+        self.target_new = float(os.getenv('TARGET_NEW_PER_RUN', 5))
+        self.min_interval = float(os.getenv('MIN_REFRESH_HOURS', 1)) * HOUR
+        self.max_interval = float(os.getenv('MAX_REFRESH_HOURS', 14 * 24)) * HOUR
+        self.initial_interval = float(os.getenv('INITIAL_REFRESH_HOURS', 24)) * HOUR
+        self.running = True
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        self._create_tables()
+
+    def _create_tables(self):
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS refresh_queue (
+                    site TEXT PRIMARY KEY,
+                    next_run REAL NOT NULL,
+                    interval REAL NOT NULL,
+                    rate_ewma REAL,
+                    avg_queries REAL,
+                    runs INTEGER NOT NULL DEFAULT 0,
+                    last_run REAL,
+                    last_new INTEGER
+                )
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS quota_usage (
+                    day TEXT PRIMARY KEY,
+                    used INTEGER NOT NULL
+                )
+            """)
+
+    def sync_sites(self, sites):
+        """Add newly configured sites (due immediately) and drop removed ones."""
+        sites = {site.strip() for site in sites if site.strip()}
+        now = time.time()
+        with self.conn:
+            for site in sites:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO refresh_queue (site, next_run, interval) VALUES (?, ?, ?)",
+                    (site, now, self.initial_interval)
+                )
+            placeholders = ','.join('?' * len(sites))
+            self.conn.execute(f"DELETE FROM refresh_queue WHERE site NOT IN ({placeholders})", tuple(sites))
+
+    def _today(self):
+        return datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+    def quota_left(self):
+        row = self.conn.execute("SELECT used FROM quota_usage WHERE day = ?", (self._today(),)).fetchone()
+        return self.daily_quota - (row['used'] if row else 0)
+
+    def _spend_quota(self, queries):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO quota_usage (day, used) VALUES (?, ?) "
+                "ON CONFLICT(day) DO UPDATE SET used = used + excluded.used",
+                (self._today(), queries)
+            )
+
+    def next_task(self):
+        """Hottest due site whose expected query cost fits in today's budget."""
+        quota_left = self.quota_left()
+        rows = self.conn.execute(
+            "SELECT * FROM refresh_queue WHERE next_run <= ? ORDER BY COALESCE(rate_ewma, 1e9) DESC, next_run",
+            (time.time(),)
+        ).fetchall()
+        for row in rows:
+            # Unknown sites may page the full 10 CSE requests
+            if (row['avg_queries'] or 10) <= quota_left:
+                return row
+        return None
+
+    def seconds_until_work(self):
+        row = self.conn.execute("SELECT MIN(next_run) AS next_run FROM refresh_queue").fetchone()
+        if row['next_run'] is None:
+            return 60
+        if row['next_run'] <= time.time():
+            # Work is due but the budget is spent; wait for the next UTC day
+            tomorrow = (datetime.now(timezone.utc) + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+            return max(tomorrow.timestamp() - time.time(), 1)
+        return row['next_run'] - time.time()
+
+    def derive_interval(self, rate_ewma, previous_interval):
+        if not rate_ewma:
+            # Back off gradually so one quiet run doesn't park a site for weeks
+            return min(previous_interval * 2, self.max_interval)
+        # rate_ewma is new postings per hour; intervals are in seconds
+        return min(max(self.target_new / rate_ewma * HOUR, self.min_interval), self.max_interval)
+
+    def run_task(self, row):
+        site = row['site']
+        stats = {}
+        started = time.time()
+        logger.info(f"🔄 Refreshing {site} (interval {row['interval'] / HOUR:.1f}h)")
+        # The site's watermark only moves once its new postings are stored
+        watermarks = WatermarkStore()
+        try:
+            new_jobs = search_jobs(job_sites=[site], delta=True, stats=stats, output_file=None, watermarks=watermarks) or []
+            if new_jobs and not save_to_airtable(new_jobs):
+                new_jobs = None
+            else:
+                watermarks.save()
+        except Exception as e:
+            logger.error(f"❌ Refresh of {site} failed: {e}")
+            new_jobs = None
+        finally:
+            self._spend_quota(stats.get('queries', 0))
+
+        if stats.get('quota_error') == 'daily':
+            # The key is dry for everyone; leave the site due and wait for the next UTC day
+            logger.error(f"⛽ Daily CSE quota spent while refreshing {site}; pausing until tomorrow (UTC)")
+            self._spend_quota(max(self.quota_left(), 0))
+            return
+
+        if new_jobs is None or stats.get('quota_error') or stats.get('http_error'):
+            # Retry failed sites at the minimum interval without touching their yield history
+            next_run = started + self.min_interval
+            with self.conn:
+                self.conn.execute("UPDATE refresh_queue SET next_run = ? WHERE site = ?", (next_run, site))
+            return
+
+        queries = stats.get('queries', 0)
+        if row['last_run'] is None:
+            # The first run is a full crawl; its backlog says nothing about the site's rate
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE refresh_queue SET next_run = ?, runs = runs + 1, last_run = ?, last_new = ? WHERE site = ?",
+                    (started + row['interval'], started, len(new_jobs), site)
+                )
+            logger.info(f"✅ {site}: baseline of {len(new_jobs)} postings, {queries} queries, next run in {row['interval'] / HOUR:.1f}h")
+            return
+
+        elapsed_hours = (started - row['last_run']) / HOUR
+        rate = len(new_jobs) / max(elapsed_hours, 1e-3)
+        rate_ewma = rate if row['rate_ewma'] is None else 0.7 * row['rate_ewma'] + 0.3 * rate
+        avg_queries = queries if row['avg_queries'] is None else 0.7 * row['avg_queries'] + 0.3 * queries
+        interval = self.derive_interval(rate_ewma, row['interval'])
+
+        with self.conn:
+            self.conn.execute(
+                "UPDATE refresh_queue SET next_run = ?, interval = ?, rate_ewma = ?, avg_queries = ?, "
+                "runs = runs + 1, last_run = ?, last_new = ? WHERE site = ?",
+                (started + interval, interval, rate_ewma, avg_queries, started, len(new_jobs), site)
+            )
+        logger.info(f"✅ {site}: {len(new_jobs)} new postings, {queries} queries, next run in {interval / HOUR:.1f}h")
+
+    def stop(self, *_):
+        logger.info("🛑 Stopping scheduler after the current task")
+        self.running = False
+
+    def run_forever(self, once=False):
+        while self.running:
+            row = self.next_task()
+            if row is None:
+                if once:
+                    break
+                wait = self.seconds_until_work()
+                logger.info(f"😴 Nothing to run; sleeping {wait / 60:.1f} min (quota left today: {self.quota_left()})")
+                # Sleep in short steps so a stop signal is honoured promptly
+                wake_at = time.time() + wait
+                while self.running and time.time() < wake_at:
+                    time.sleep(min(5, wake_at - time.time()))
+                continue
+            self.run_task(row)
+
+
+def configured_sites():
+    sites = os.getenv('JOB_SITES', '').split(',')
+    for suffix in ['', '_TWO', '_THREE', '_FOUR']:
+        sites += os.getenv(f'OTHER_PLATFORMS{suffix}', '').split(',')
+    return sites
+
+
+def main():
+    configure()
+    parser = argparse.ArgumentParser(description="Continuously refresh job site queries by observed yield")
+    parser.add_argument('--once', action='store_true', help="run every due site once and exit (for cron)")
+    args = parser.parse_args()
+
+    scheduler = RefreshScheduler()
+    scheduler.sync_sites(configured_sites())
+    signal.signal(signal.SIGTERM, scheduler.stop)
+    signal.signal(signal.SIGINT, scheduler.stop)
+    logger.info("🚀 Starting refresh scheduler...")
+    scheduler.run_forever(once=args.once)
+
+
+if __name__ == "__main__":
+    main()
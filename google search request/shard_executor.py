@@ -0,0 +1,329 @@
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from google_search_json_api import search_jobs, save_to_airtable
+from helpers.runtime import configure
+from refresh_scheduler import configured_sites
+
+logger = logging.getLogger(__name__)
+
+# A site query pages at most 10 CSE requests; this much quota is reserved per shard
+SHARD_COST = 10
+# A shard whose worker hasn't finished within the lease is handed to another worker
+LEASE_SECONDS = 15 * 60
+# A key that is still rate limited after api_helper's retries sits out this long
+RATE_LIMIT_COOLDOWN = 60
+MAX_ATTEMPTS = 3
+
+
+def configured_credentials():
+    """
+    (api_key, search_engine_id) pairs from GOOGLE_API_KEYS / GOOGLE_SEARCH_ENGINE_IDS
+    (comma separated, one engine id may serve every key), falling back to the
+    single GOOGLE_API_KEY / GOOGLE_SEARCH_ENGINE_ID pair.
+    """
+    keys = [key.strip() for key in os.getenv('GOOGLE_API_KEYS', os.getenv('GOOGLE_API_KEY', '')).split(',') if key.strip()]
+    engine_ids = [cx.strip() for cx in os.getenv('GOOGLE_SEARCH_ENGINE_IDS', os.getenv('GOOGLE_SEARCH_ENGINE_ID', '')).split(',') if cx.strip()]
+    if len(engine_ids) == 1:
+        engine_ids *= len(keys)
+    if len(engine_ids) != len(keys):
+        raise ValueError("GOOGLE_SEARCH_ENGINE_IDS needs one id, or one id per key in GOOGLE_API_KEYS")
+    return list(zip(keys, engine_ids))
+
+
+def key_fingerprint(api_key):
+    """Stable, non-reversible id for an API key; only this is ever written to the shard database."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:12]
+
+
+class ShardCoordinator:
+    """
+    Splits a search run into per-site shards on a shared SQLite queue.
+
+    Any number of worker processes on this host, started here or by
+    `--join`, claim shards under a lease. The database must be on a local
+    disk (SQLite's WAL mode doesn't work over network filesystems). Each
+    shard reserves quota on whichever credential has the most left today,
+    and results land in the shard_results table. Keys are tracked by
+    fingerprint only and resolved from the environment in each worker. When
+    a key reports its daily quota is spent it is marked exhausted and the
+    shard goes back on the queue for another key, so capacity grows with
+    every key and worker added.
+    """
+
+    def __init__(self, db_path=None, daily_quota=None, credentials=None):
+        self.db_path = db_path or os.getenv('SHARD_DB', 'search_shards.db')
+        credentials = configured_credentials() if credentials is None else credentials
+        self.credentials = {key_fingerprint(api_key): (api_key, cx) for api_key, cx in credentials}
+        self.daily_quota = int(daily_quota or os.getenv('KEY_DAILY_QUOTA', 100))
+        self.conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self._create_tables()
+
+    def _create_tables(self):
+        # Databases from before keys were fingerprinted held raw keys; drop those tables
+        if self.conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'credentials'").fetchone():
+            self.conn.executescript("DROP TABLE credentials; DROP TABLE IF EXISTS key_quota; VACUUM;")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS shards (
+                site TEXT PRIMARY KEY,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                queries INTEGER NOT NULL DEFAULT 0,
+                found INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS shard_results (
+                link TEXT PRIMARY KEY,
+                site TEXT NOT NULL,
+                job TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS key_quota (
+                key_id TEXT NOT NULL,
+                day TEXT NOT NULL,
+                used INTEGER NOT NULL DEFAULT 0,
+                exhausted INTEGER NOT NULL DEFAULT 0,
+                blocked_until REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (key_id, day)
+            );
+        """)
+
+    def _today(self):
+        return datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front so two workers can't claim the same row
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def seed(self, sites, fresh=True):
+        """Queue one shard per site; `fresh` drops the previous run."""
+        sites = {site.strip() for site in sites if site.strip()}
+        conn = self._transaction()
+        try:
+            if fresh:
+                conn.execute("DELETE FROM shards")
+                conn.execute("DELETE FROM shard_results")
+            conn.executemany("INSERT OR IGNORE INTO shards (site) VALUES (?)", [(site,) for site in sites])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def claim_shard(self, worker):
+        """Lease the next pending shard (or one whose worker died); None when the queue is drained."""
+        now = time.time()
+        conn = self._transaction()
+        try:
+            row = conn.execute(
+                "SELECT site FROM shards WHERE (status = 'pending' OR (status = 'running' AND lease_until < ?)) "
+                "AND attempts < ? ORDER BY attempts, site LIMIT 1", (now, MAX_ATTEMPTS)
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE shards SET status = 'running', worker = ?, lease_until = ?, attempts = attempts + 1 "
+                    "WHERE site = ?", (worker, now + LEASE_SECONDS, row['site'])
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return row['site'] if row else None
+
+    def _key_ids(self):
+        return list(self.credentials), ','.join('?' * len(self.credentials))
+
+    def acquire_credential(self, cost=SHARD_COST):
+        """
+        Reserve `cost` queries on the key with the most quota left today.
+        Returns (key_id, api_key, search_engine_id), or None if no key can cover it.
+        """
+        if not self.credentials:
+            return None
+        day, now = self._today(), time.time()
+        key_ids, placeholders = self._key_ids()
+        conn = self._transaction()
+        try:
+            conn.executemany("INSERT OR IGNORE INTO key_quota (key_id, day) VALUES (?, ?)",
+                             [(key_id, day) for key_id in key_ids])
+            row = conn.execute(
+                f"SELECT key_id FROM key_quota WHERE day = ? AND key_id IN ({placeholders}) "
+                "AND exhausted = 0 AND blocked_until <= ? AND used + ? <= ? ORDER BY used LIMIT 1",
+                (day, *key_ids, now, cost, self.daily_quota)
+            ).fetchone()
+            if row:
+                conn.execute("UPDATE key_quota SET used = used + ? WHERE key_id = ? AND day = ?",
+                             (cost, row['key_id'], day))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return (row['key_id'], *self.credentials[row['key_id']]) if row else None
+
+    def release_credential(self, key_id, reserved, used, quota_error=None):
+        """Settle a reservation with the queries actually made and record any quota error."""
+        day = self._today()
+        self.conn.execute(
+            "UPDATE key_quota SET used = used - ? + ?, "
+            "exhausted = CASE WHEN ? = 'daily' THEN 1 ELSE exhausted END, "
+            "blocked_until = CASE WHEN ? = 'rate' THEN ? ELSE blocked_until END "
+            "WHERE key_id = ? AND day = ?",
+            (reserved, used, quota_error, quota_error, time.time() + RATE_LIMIT_COOLDOWN, key_id, day)
+        )
+        if quota_error == 'daily':
+            logger.warning(f"⛽ API key {key_id} exhausted for {day}, failing over")
+
+    def seconds_until_credential(self):
+        """How long until a rate-limited key is usable again; None if every key is out for the day."""
+        if not self.credentials:
+            return None
+        key_ids, placeholders = self._key_ids()
+        row = self.conn.execute(
+            f"SELECT MIN(blocked_until) AS blocked_until FROM key_quota WHERE day = ? AND key_id IN ({placeholders}) "
+            "AND exhausted = 0 AND used + ? <= ?",
+            (self._today(), *key_ids, SHARD_COST, self.daily_quota)
+        ).fetchone()
+        if row['blocked_until'] is None:
+            return None
+        return max(row['blocked_until'] - time.time(), 0)
+
+    def finish_shard(self, site, jobs, queries, complete):
+        """Store a shard's results; incomplete shards (quota ran out) go back on the queue."""
+        conn = self._transaction()
+        try:
+            conn.executemany(
+                "INSERT OR IGNORE INTO shard_results (link, site, job) VALUES (?, ?, ?)",
+                [(job['Link'], site, json.dumps(job)) for job in jobs]
+            )
+            conn.execute(
+                "UPDATE shards SET status = ?, lease_until = NULL, queries = queries + ?, found = found + ? "
+                "WHERE site = ?", ('done' if complete else 'pending', queries, len(jobs), site)
+            )
+            if not complete:
+                # Running out of quota isn't the shard's fault
+                conn.execute("UPDATE shards SET attempts = attempts - 1 WHERE site = ?", (site,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def release_shard(self, site):
+        """Put a claimed shard back untouched (no credential was available)."""
+        self.conn.execute(
+            "UPDATE shards SET status = 'pending', lease_until = NULL, attempts = attempts - 1 WHERE site = ?", (site,)
+        )
+
+    def fail_shard(self, site):
+        self.conn.execute(
+            "UPDATE shards SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "lease_until = NULL WHERE site = ?", (MAX_ATTEMPTS, site)
+        )
+
+    def results(self):
+        return [json.loads(row['job']) for row in self.conn.execute("SELECT job FROM shard_results ORDER BY rowid")]
+
+    def progress(self):
+        rows = self.conn.execute("SELECT status, COUNT(*) AS n FROM shards GROUP BY status").fetchall()
+        return {row['status']: row['n'] for row in rows}
+
+
+def work(db_path=None, worker=None, delta=None):
+    """Worker loop: claim shards and search them until the queue is drained or no key has quota."""
+    configure()
+    worker = worker or f"worker-{os.getpid()}"
+    coordinator = ShardCoordinator(db_path)
+    searched = 0
+
+    while True:
+        site = coordinator.claim_shard(worker)
+        if site is None:
+            break
+
+        credential = coordinator.acquire_credential()
+        if credential is None:
+            coordinator.release_shard(site)
+            wait = coordinator.seconds_until_credential()
+            if wait is None:
+                logger.warning(f"⛽ [{worker}] every API key is out of quota for today; leaving the rest queued")
+                break
+            time.sleep(wait)
+            continue
+
+        key_id, api_key, search_engine_id = credential
+        stats = {}
+        logger.info(f"🔍 [{worker}] {site} with key {key_id}")
+        try:
+            jobs = search_jobs(api_key=api_key, search_engine_id=search_engine_id, delta=delta,
+                               job_sites=[site], stats=stats, output_file=None)
+        except Exception as e:
+            logger.error(f"❌ [{worker}] shard {site} failed: {e}")
+            coordinator.fail_shard(site)
+            continue
+        finally:
+            coordinator.release_credential(key_id, SHARD_COST, stats.get('queries', 0), stats.get('quota_error'))
+
+        coordinator.finish_shard(site, jobs, stats.get('queries', 0), complete=not stats.get('quota_error'))
+        searched += 1
+
+    logger.info(f"🏁 [{worker}] finished after {searched} shards")
+    return searched
+
+
+def run_sharded_search(sites=None, workers=None, delta=None, db_path=None, fresh=True, output_file='job_listings.json'):
+    """Search every site across `workers` processes and all configured credentials; returns the jobs found."""
+    coordinator = ShardCoordinator(db_path)
+    if not coordinator.credentials:
+        raise ValueError("No Google API credentials configured")
+    coordinator.seed(sites or configured_sites(), fresh=fresh)
+    workers = workers or int(os.getenv('SHARD_WORKERS', 0)) or min(os.cpu_count() or 1, len(coordinator.credentials) * 4)
+    logger.info(f"🚀 Searching {sum(coordinator.progress().values())} shards with {workers} workers and {len(coordinator.credentials)} keys")
+
+    processes = [
+        multiprocessing.Process(target=work, args=(coordinator.db_path, None, delta), name=f"search-worker-{i}")
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    job_results = coordinator.results()
+    logger.info(f"📊 Shards: {coordinator.progress()}; {len(job_results)} unique job results")
+    if output_file:
+        with open(output_file, "w") as f:
+            json.dump(job_results, f, indent=4)
+        logger.info(f"💾 Saved results to {output_file}")
+    return job_results
+
+
+def main():
+    configure()
+    parser = argparse.ArgumentParser(description="Run the job search sharded across API keys and worker processes")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: $SHARD_WORKERS or CPU count)")
+    parser.add_argument('--delta', action='store_true', help="only fetch results newer than each query's watermark")
+    parser.add_argument('--resume', action='store_true', help="continue the previous run's queue instead of starting over")
+    parser.add_argument('--join', action='store_true', help="add a worker on this host to an already running queue")
+    args = parser.parse_args()
+
+    if args.join:
+        work(delta=args.delta or None)
+        return
+    job_results = run_sharded_search(workers=args.workers, delta=args.delta or None, fresh=not args.resume)
+    if not save_to_airtable(job_results):
+        # Workers have already moved the watermarks; the shard database keeps every result for a retry
+        logger.error("❌ Results were not saved; they are kept in the shard database, run again with --resume to save them")
+
+
+if __name__ == "__main__":
+    main()
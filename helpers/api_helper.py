@@ -2,6 +2,7 @@ import logging
 import requests
 import time
 # from logger import LOG
+from helpers.concurrency import AdaptiveLimiter
 
 
 LOG = logging.getLogger(__name__)
@@ -9,6 +10,9 @@ LOG.setLevel(logging.INFO)
 
 valid_methods = ["get", "post", "patch", "put"]
 
+# Shared by every caller so concurrent workers hitting the same host adapt together
+DEFAULT_LIMITER = AdaptiveLimiter()
+
 
 def custom_requests_patch(*args, **kwargs):
     return exponential_backoff(*args, method="patch", **kwargs)
@@ -20,10 +24,20 @@ def custom_requests_get(*args, **kwargs):
     return exponential_backoff(*args, method="get", **kwargs)
 
 def custom_requests_put(*args, **kwargs):
-    return exponential_backoff(*args, method="get", **kwargs)
+    return exponential_backoff(*args, method="put", **kwargs)
 
 
-def exponential_backoff(*args, method="get", **kwargs):
+def _limited_request(limiter, method, *args, **kwargs):
+    if limiter is None:
+        return getattr(requests, method)(*args, **kwargs)
+    url = kwargs.get("url") or args[0]
+    with limiter.slot(url) as slot:
+        response = getattr(requests, method)(*args, **kwargs)
+        slot.record(response.status_code)
+    return response
+
+
+def exponential_backoff(*args, method="get", limiter=DEFAULT_LIMITER, **kwargs):
     retries, max_retries = 0, 5
     backoff_seconds, max_backoff = 2, 32
 
@@ -33,7 +47,7 @@ def exponential_backoff(*args, method="get", **kwargs):
         raise ValueError(f"Invalid method: {method}")
 
     # Make the request
-    response = getattr(requests, method)(*args, **kwargs)
+    response = _limited_request(limiter, method, *args, **kwargs)
 
     while response.status_code == 429 and retries < max_retries:
         # Adjust backoff time based on server header if available
@@ -45,7 +59,7 @@ def exponential_backoff(*args, method="get", **kwargs):
         LOG.info(f"Attempt {retries + 1}/{max_retries} - Received 429 status, retrying in {backoff_seconds} seconds...")
         time.sleep(backoff_seconds)
         retries += 1
-        response = getattr(requests, method)(*args, **kwargs)
+        response = _limited_request(limiter, method, *args, **kwargs)
 
     # Handle different status codes
     if response.status_code == 429:
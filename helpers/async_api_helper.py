@@ -0,0 +1,221 @@
+import asyncio
+import json
+import logging
+import random
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+import aiohttp
+
+LOG = logging.getLogger(__name__)
+LOG.setLevel(logging.INFO)
+
+valid_methods = ["get", "post", "patch", "put", "delete", "head"]
+
+# Methods that can be safely replayed after a 5xx, timeout or dropped connection
+idempotent_methods = {"get", "put", "delete", "head"}
+
+RETRYABLE_STATUSES = {500, 502, 503, 504}
+
+
+async def async_requests_patch(session, *args, **kwargs):
+    return await async_request(session, *args, method="patch", **kwargs)
+
+async def async_requests_post(session, *args, **kwargs):
+    return await async_request(session, *args, method="post", **kwargs)
+
+async def async_requests_get(session, *args, **kwargs):
+    return await async_request(session, *args, method="get", **kwargs)
+
+async def async_requests_put(session, *args, **kwargs):
+    return await async_request(session, *args, method="put", **kwargs)
+
+async def async_requests_delete(session, *args, **kwargs):
+    return await async_request(session, *args, method="delete", **kwargs)
+
+
+class HTTPStatusError(Exception):
+    """Raised by AsyncResponse.raise_for_status for 4xx/5xx responses."""
+
+    def __init__(self, status_code, url, message=""):
+        super().__init__(f"{status_code} for {url}: {message}")
+        self.status_code = status_code
+        self.url = url
+
+
+class AsyncResponse:
+    """Fully read response, safe to use after the connection is released."""
+
+    def __init__(self, status_code, headers, body, url):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = body
+        self.url = url
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise HTTPStatusError(self.status_code, self.url, self.text[:200])
+
+
+def retry_after_seconds(headers):
+    """Parse Retry-After (seconds or HTTP date) or the Quickbase throttle header."""
+    value = headers.get("Retry-After") or headers.get("X-QBAPI-Throttle-TTL")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def full_jitter(attempt, base_seconds=0.5, max_backoff=32):
+    """Full-jitter backoff: uniform in [0, min(max_backoff, base * 2 ** attempt)]."""
+    return random.uniform(0, min(max_backoff, base_seconds * 2 ** attempt))
+
+
+async def _read_body(raw, max_bytes=None):
+    """Whole body, or only its first `max_bytes` (the rest is never downloaded)."""
+    if max_bytes is None:
+        return await raw.read()
+    body = bytearray()
+    async for chunk in raw.content.iter_chunked(16 * 1024):
+        body += chunk
+        if len(body) >= max_bytes:
+            break
+    return bytes(body[:max_bytes])
+
+
+async def _send(session, method, timeout, limiter, *args, max_bytes=None, **kwargs):
+    if limiter is None:
+        async with session.request(method.upper(), *args, timeout=timeout, **kwargs) as raw:
+            return AsyncResponse(raw.status, raw.headers, await _read_body(raw, max_bytes), str(raw.url))
+
+    url = str(kwargs.get("url") or args[0])
+    async with limiter.slot(url) as slot:
+        async with session.request(method.upper(), *args, timeout=timeout, **kwargs) as raw:
+            response = AsyncResponse(raw.status, raw.headers, await _read_body(raw, max_bytes), str(raw.url))
+        slot.record(response.status_code)
+    return response
+
+
+async def async_request(
+    session,
+    *args,
+    method="get",
+    max_retries=5,
+    request_timeout=15,
+    deadline=60,
+    base_backoff=0.5,
+    max_backoff=32,
+    limiter=None,
+    max_bytes=None,
+    **kwargs,
+):
+    """
+    Send a request with retries, a per-attempt timeout and a total deadline.
+
+    429 responses are retried for every method. 5xx responses, timeouts and
+    connection errors are only retried for idempotent methods. The last
+    response is returned once retries or the deadline run out; if no response
+    was ever received the last exception is raised instead.
+
+    Args:
+        session (aiohttp.ClientSession): Shared session for connection pooling
+        method (str): HTTP method name
+        max_retries (int): Retries after the first attempt
+        request_timeout (float): Seconds allowed for a single attempt
+        deadline (float): Seconds allowed for all attempts and backoffs combined
+        limiter (AsyncAdaptiveLimiter): Optional per-host AIMD concurrency limiter
+        max_bytes (int): Only read this much of the body; None reads all of it
+    Returns:
+        AsyncResponse: Status, headers and body of the final attempt
+    """
+    if method not in valid_methods:
+        LOG.error(f"Invalid method: {method}. Valid methods: {valid_methods}")
+        raise ValueError(f"Invalid method: {method}")
+
+    loop = asyncio.get_running_loop()
+    give_up_at = loop.time() + deadline
+    retryable = method in idempotent_methods
+    response, last_error = None, None
+
+    for attempt in range(max_retries + 1):
+        remaining = give_up_at - loop.time()
+        if remaining <= 0:
+            LOG.error(f"Deadline of {deadline}s exhausted after {attempt} attempts.")
+            break
+
+        timeout = aiohttp.ClientTimeout(total=min(request_timeout, remaining))
+        try:
+            response = await _send(session, method, timeout, limiter, *args, max_bytes=max_bytes, **kwargs)
+            last_error = None
+        except (asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError) as e:
+            last_error = e
+            if not retryable:
+                raise
+            LOG.info(f"Attempt {attempt + 1}/{max_retries + 1} - {type(e).__name__} on {method.upper()}")
+        else:
+            status = response.status_code
+            if status != 429 and not (retryable and status in RETRYABLE_STATUSES):
+                break
+            LOG.info(f"Attempt {attempt + 1}/{max_retries + 1} - Received {status} status")
+
+        if attempt == max_retries:
+            break
+
+        server_delay = retry_after_seconds(response.headers) if response is not None and last_error is None else None
+        delay = min(server_delay, max_backoff) if server_delay is not None else full_jitter(attempt, base_backoff, max_backoff)
+        if loop.time() + delay >= give_up_at:
+            LOG.error(f"Backoff of {delay:.1f}s would exceed the {deadline}s deadline, giving up.")
+            break
+        await asyncio.sleep(delay)
+
+    if last_error is not None:
+        if response is None:
+            raise last_error
+        LOG.error(f"Request failed after retries: {last_error}")
+    if response is None:
+        raise asyncio.TimeoutError(f"Deadline of {deadline}s exhausted before any attempt")
+
+    if response.status_code == 429:
+        LOG.error("Max retries reached. Request failed with 429 Too Many Requests.")
+    elif response.status_code >= 500:
+        LOG.error(f"Server error: {response.status_code}.")
+    elif response.status_code >= 400:
+        LOG.warning(f"Client error: {response.status_code}.")
+    else:
+        LOG.info(f"Request succeeded with status: {response.status_code}.")
+
+    return response
+
+
+async def gather_requests(session, requests_kwargs, concurrency=10, limiter=None):
+    """
+    Run many async_request calls concurrently, at most `concurrency` at a time.
+    An AsyncAdaptiveLimiter additionally adapts the in-flight count per host.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(kwargs):
+        async with semaphore:
+            try:
+                return await async_request(session, limiter=limiter, **kwargs)
+            except Exception as e:
+                LOG.warning(f"Request to {kwargs.get('url')} failed: {e}")
+                return e
+
+    return await asyncio.gather(*(run(kwargs) for kwargs in requests_kwargs))
@@ -0,0 +1,109 @@
+import logging
+import threading
+import time
+from collections import deque
+
+LOG = logging.getLogger(__name__)
+LOG.setLevel(logging.INFO)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for a single host.
+
+    Closed: requests flow. Open: requests are skipped until the cool-down
+    expires. Half-open: one trial request is let through; success closes the
+    breaker, failure re-opens it for another cool-down. If a trial never
+    reports back, another is allowed after a further cool-down.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold=3, cooldown_seconds=300):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            # opened_at doubles as the trial start while half-open, so a trial
+            # whose outcome is never recorded can't block the host for good
+            if time.monotonic() - self.opened_at >= self.cooldown_seconds:
+                # Let exactly one trial request through
+                self.state = self.HALF_OPEN
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class DomainCircuitBreakers:
+    """Lazily created CircuitBreaker per domain."""
+
+    def __init__(self, failure_threshold=3, cooldown_seconds=300):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, domain):
+        with self._lock:
+            breaker = self._breakers.get(domain)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.cooldown_seconds)
+                self._breakers[domain] = breaker
+            return breaker
+
+    def allow(self, domain):
+        return self.get(domain).allow()
+
+    def record_success(self, domain):
+        self.get(domain).record_success()
+
+    def record_failure(self, domain):
+        breaker = self.get(domain)
+        was_open = breaker.state == CircuitBreaker.OPEN
+        breaker.record_failure()
+        if not was_open and breaker.state == CircuitBreaker.OPEN:
+            LOG.warning(f"Circuit opened for {domain} for {self.cooldown_seconds}s after {breaker.failures} failures")
+
+    def open_domains(self):
+        return [domain for domain, breaker in self._breakers.items() if breaker.state != CircuitBreaker.CLOSED]
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies used to pick a hedging threshold."""
+
+    def __init__(self, window=200, min_samples=20):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct):
+        """Return the pct-th percentile latency, or None until enough samples exist."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(int(len(ordered) * pct / 100), len(ordered) - 1)
+        return ordered[index]
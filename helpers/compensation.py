@@ -0,0 +1,159 @@
+import json
+import logging
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+
+LOG = logging.getLogger(__name__)
+LOG.setLevel(logging.INFO)
+
+# Jboard's compensation_time_frame values, and how many of each make a year
+PERIODS = ('hourly', 'daily', 'weekly', 'monthly', 'annually')
+ANNUAL_FACTORS = np.array([2080.0, 260.0, 52.0, 12.0, 1.0])
+ANNUAL = PERIODS.index('annually')
+HOURLY = PERIODS.index('hourly')
+
+PERIOD_WORDS = {
+    'hour': 'hourly', 'hr': 'hourly', 'hourly': 'hourly',
+    'day': 'daily', 'daily': 'daily',
+    'week': 'weekly', 'wk': 'weekly', 'weekly': 'weekly',
+    'month': 'monthly', 'mo': 'monthly', 'monthly': 'monthly',
+    'year': 'annually', 'yr': 'annually', 'annum': 'annually', 'annual': 'annually',
+    'annually': 'annually', 'yearly': 'annually',
+}
+
+CURRENCY_MARKERS = {
+    '$': 'USD', 'us$': 'USD', '€': 'EUR', '£': 'GBP',
+    'c$': 'CAD', 'ca$': 'CAD', 'a$': 'AUD', 'au$': 'AUD',
+}
+CURRENCY_CODES = ('USD', 'EUR', 'GBP', 'CAD', 'AUD', 'CHF', 'INR', 'SGD', 'NZD')
+
+# Units of each currency per USD; override or extend with EXCHANGE_RATES_FILE (JSON)
+DEFAULT_RATES = {
+    'USD': 1.0, 'EUR': 0.92, 'GBP': 0.79, 'CAD': 1.36, 'AUD': 1.52,
+    'CHF': 0.88, 'INR': 83.0, 'SGD': 1.35, 'NZD': 1.65,
+}
+
+_CURRENCY = r'US\$|CA?\$|AU?\$|[$€£]|\b(?:' + '|'.join(CURRENCY_CODES) + r')\b'
+_AMOUNT = r'\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?'
+FRAGMENT_PATTERN = re.compile(
+    rf'(?P<currency>{_CURRENCY})?\s*(?P<low>{_AMOUNT})\s*(?P<low_k>k\b)?'
+    rf'(?:\s*(?:-|–|—|to)\s*(?:{_CURRENCY})?\s*(?P<high>{_AMOUNT})\s*(?P<high_k>k\b)?)?'
+    rf'(?:\s*(?P<code>\b(?:{"|".join(CURRENCY_CODES)})\b))?'
+    r'(?:\s*(?P<sep>/|per\b|an?\b|-)?\s*-?\s*(?P<period>' + '|'.join(sorted(PERIOD_WORDS, key=len, reverse=True)) + r')\b)?',
+    re.IGNORECASE
+)
+# Retirement plans look like "401k" amounts
+RETIREMENT_PLAN_PATTERN = re.compile(r'\b40[13]\s*\(?[kb]\)?', re.IGNORECASE)
+# Period words that only ever describe a rate; "year"/"month" etc. also count durations ("3 year contract")
+RATE_WORDS = {'hourly', 'daily', 'weekly', 'monthly', 'annually', 'yearly', 'annual', 'annum'}
+
+# Bare numbers below this with no currency, "k" or period are noise (e.g. "5 years")
+MIN_BARE_AMOUNT = 1000
+# Amounts with no stated period below this are taken to be hourly rates
+HOURLY_CEILING = 500
+
+
+@lru_cache(maxsize=None)
+def rate_table():
+    """Currency -> units per USD, loaded once per process."""
+    rates = dict(DEFAULT_RATES)
+    path = os.getenv('EXCHANGE_RATES_FILE')
+    if path:
+        try:
+            with open(path, 'r') as f:
+                rates.update({code.upper(): float(rate) for code, rate in json.load(f).items()})
+        except (OSError, ValueError) as e:
+            LOG.warning(f"Ignoring exchange rate file {path}: {e}")
+    return rates
+
+
+def _currency_code(marker):
+    if not marker:
+        return ''
+    marker = marker.strip().lower()
+    return CURRENCY_MARKERS.get(marker, marker.upper())
+
+
+def normalize_compensation(texts, currency_hints=None):
+    """
+    Parse a batch of free-text compensation strings into numeric ranges.
+
+    All strings are scanned in one regex pass and the arithmetic runs over
+    whole arrays. Returns a dict of arrays aligned with `texts`:
+    'min'/'max' in the posting's own currency and period, 'period' (a
+    PERIODS value), 'currency' (ISO code), and 'annual_min_usd'/'annual_max_usd'
+    for filtering and sorting across postings. Unparseable entries get NaN
+    and ''. `currency_hints` (e.g. existing "Compensation Currency" values)
+    fill in the currency when the text has no symbol; otherwise USD.
+    Retirement plans ("401k") and durations ("3 year contract") are not pay.
+    """
+    n = len(texts)
+    texts = ['' if text is None or text == 'N/A' else RETIREMENT_PLAN_PATTERN.sub(' ', str(text)) for text in texts]
+    hints = [
+        (hint or '').upper() if (hint or '').upper() in rate_table() else ''
+        for hint in (currency_hints or [''] * n)
+    ]
+
+    # One scan over the whole batch; \x00 can't be matched by \s, so ranges never span two records
+    starts = np.cumsum([0] + [len(text) + 1 for text in texts[:-1]]) if n else np.zeros(0, dtype=int)
+    matches = list(FRAGMENT_PATTERN.finditer('\x00'.join(texts)))
+
+    result = {
+        'min': np.full(n, np.nan), 'max': np.full(n, np.nan),
+        'period': np.full(n, '', dtype=object), 'currency': np.full(n, '', dtype=object),
+        'annual_min_usd': np.full(n, np.nan), 'annual_max_usd': np.full(n, np.nan),
+    }
+    if not matches:
+        return result
+
+    record = np.searchsorted(starts, [m.start() for m in matches], side='right') - 1
+    low = np.array([float(m['low'].replace(',', '')) for m in matches])
+    high = np.array([float(m['high'].replace(',', '')) if m['high'] else np.nan for m in matches])
+    low_k = np.array([bool(m['low_k']) for m in matches])
+    high_k = np.array([bool(m['high_k']) for m in matches])
+    stated_period = np.array([PERIODS.index(PERIOD_WORDS[m['period'].lower()]) if m['period'] else -1 for m in matches])
+    # "/hr", "per year", "an hour" or "hourly" mark a rate; a bare "3 year" or "12-month" is a duration
+    rate_stated = np.array([
+        bool(m['period']) and (m['sep'] not in (None, '-') or m['period'].lower() in RATE_WORDS) for m in matches
+    ])
+    currency = np.array([_currency_code(m['currency'] or m['code']) for m in matches], dtype=object)
+
+    # "$50-70k": the k on the upper bound applies to a short lower bound too
+    low_k |= high_k & (low < 1000)
+    low = np.where(low_k, low * 1000, low)
+    high = np.where(high_k, high * 1000, high)
+    high = np.where(np.isnan(high), low, high)
+    low, high = np.minimum(low, high), np.maximum(low, high)
+
+    marked = (currency != '') | low_k | rate_stated
+    keep = marked | (low >= MIN_BARE_AMOUNT)
+    if not keep.any():
+        return result
+    record, low, high, stated_period, currency = record[keep], low[keep], high[keep], stated_period[keep], currency[keep]
+
+    period = np.where(stated_period >= 0, stated_period, np.where(high < HOURLY_CEILING, HOURLY, ANNUAL))
+    currency = np.where(currency != '', currency, np.array(hints, dtype=object)[record])
+    currency = np.where(currency != '', currency, 'USD')
+    rates = rate_table()
+    usd_rate = np.array([rates.get(code, np.nan) for code in currency])
+
+    annual_low_usd = low * ANNUAL_FACTORS[period] / usd_rate
+    annual_high_usd = high * ANNUAL_FACTORS[period] / usd_rate
+
+    # Each record takes the period and currency of its first fragment and the widest range across all of them
+    first = np.unique(record, return_index=True)[1]
+    owners = record[first]
+    result['period'][owners] = np.array(PERIODS, dtype=object)[period[first]]
+    result['currency'][owners] = currency[first]
+
+    np.fmin.at(result['annual_min_usd'], record, annual_low_usd)
+    np.fmax.at(result['annual_max_usd'], record, annual_high_usd)
+
+    own_factor = ANNUAL_FACTORS[period[first]]
+    own_rate = usd_rate[first]
+    result['min'][owners] = np.round(result['annual_min_usd'][owners] * own_rate / own_factor, 2)
+    result['max'][owners] = np.round(result['annual_max_usd'][owners] * own_rate / own_factor, 2)
+    return result
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from urllib.parse import urlparse
+
+LOG = logging.getLogger(__name__)
+LOG.setLevel(logging.INFO)
+
+# Statuses that mean "you are sending too much" rather than "your request is wrong"
+OVERLOAD_STATUSES = {429, 500, 502, 503, 504}
+
+
+class AIMDState:
+    """
+    Additive-increase / multiplicative-decrease concurrency limit for one host.
+
+    Every healthy response grows the limit by `increase / limit`, so a full
+    window of successes adds `increase`. A 429/5xx, a connection error or a
+    latency spike (latency above `spike_factor` times the smoothed baseline)
+    multiplies the limit by `decrease`, at most once per baseline latency so a
+    burst of failures from one window only counts once.
+    """
+
+    def __init__(self, initial=4, min_limit=1, max_limit=64, increase=1.0, decrease=0.5, spike_factor=3.0):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.spike_factor = spike_factor
+        self.in_flight = 0
+        self.latency_ewma = None
+        self.successes = 0
+        self.failures = 0
+        self._last_decrease = 0.0
+
+    def on_success(self, latency):
+        self.successes += 1
+        if self.latency_ewma is not None and latency > self.spike_factor * self.latency_ewma:
+            self._back_off()
+        else:
+            self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+        self.latency_ewma = latency if self.latency_ewma is None else 0.9 * self.latency_ewma + 0.1 * latency
+
+    def on_failure(self):
+        self.failures += 1
+        self._back_off()
+
+    def _back_off(self):
+        now = time.monotonic()
+        if now - self._last_decrease < (self.latency_ewma or 0):
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.decrease)
+
+    def record(self, latency, status_code=None, error=None):
+        if error is not None or status_code in OVERLOAD_STATUSES:
+            self.on_failure()
+        else:
+            self.on_success(latency)
+
+    def metrics(self):
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "latency_ewma": round(self.latency_ewma, 4) if self.latency_ewma is not None else None,
+            "successes": self.successes,
+            "failures": self.failures,
+        }
+
+
+class Slot:
+    """Handle given to a caller holding a limiter slot; report the outcome on it."""
+
+    def __init__(self):
+        self.status_code = None
+        self.error = None
+
+    def record(self, status_code=None, error=None):
+        self.status_code = status_code
+        self.error = error
+
+
+class AdaptiveLimiter:
+    """
+    Per-host AIMD limiter for threaded callers.
+
+    Usage:
+        with limiter.slot(url) as slot:
+            response = requests.get(url)
+            slot.record(response.status_code)
+    """
+
+    def __init__(self, **aimd_kwargs):
+        self.aimd_kwargs = aimd_kwargs
+        self._hosts = {}
+        self._cond = threading.Condition()
+
+    def _state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = AIMDState(**self.aimd_kwargs)
+            self._hosts[host] = state
+        return state
+
+    @contextmanager
+    def slot(self, url):
+        host = urlparse(url).netloc or url
+        with self._cond:
+            state = self._state(host)
+            while state.in_flight >= int(state.limit):
+                self._cond.wait()
+            state.in_flight += 1
+
+        slot = Slot()
+        started = time.monotonic()
+        try:
+            yield slot
+        except Exception as e:
+            slot.error = e
+            raise
+        finally:
+            with self._cond:
+                state.in_flight -= 1
+                state.record(time.monotonic() - started, slot.status_code, slot.error)
+                self._cond.notify_all()
+
+    def metrics(self):
+        """Current limit, in-flight count and latency per host."""
+        with self._cond:
+            return {host: state.metrics() for host, state in self._hosts.items()}
+
+    def log_metrics(self):
+        for host, values in self.metrics().items():
+            LOG.info(f"Concurrency {host}: {values}")
+
+
+class AsyncAdaptiveLimiter(AdaptiveLimiter):
+    """
+    Per-host AIMD limiter for asyncio callers. Create it inside the event loop
+    it will be used from.
+
+    Usage:
+        async with limiter.slot(url) as slot:
+            response = await async_requests_get(session, url)
+            slot.record(response.status_code)
+    """
+
+    def __init__(self, **aimd_kwargs):
+        super().__init__(**aimd_kwargs)
+        self._cond = asyncio.Condition()
+
+    @asynccontextmanager
+    async def slot(self, url):
+        host = urlparse(url).netloc or url
+        async with self._cond:
+            state = self._state(host)
+            await self._cond.wait_for(lambda: state.in_flight < int(state.limit))
+            state.in_flight += 1
+
+        slot = Slot()
+        started = time.monotonic()
+        try:
+            yield slot
+        except Exception as e:
+            slot.error = e
+            raise
+        finally:
+            async with self._cond:
+                state.in_flight -= 1
+                state.record(time.monotonic() - started, slot.status_code, slot.error)
+                self._cond.notify_all()
+
+    def metrics(self):
+        return {host: state.metrics() for host, state in self._hosts.items()}
@@ -0,0 +1,398 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from helpers.compensation import normalize_compensation
+
+LOG = logging.getLogger(__name__)
+LOG.setLevel(logging.INFO)
+
+# Airtable field name -> local column
+FIELD_COLUMNS = {
+    "Title": "title",
+    "Link": "link",
+    "Company": "company",
+    "Location": "location",
+    "Description": "description",
+    "Snippet": "snippet",
+    "Compensation": "compensation",
+    "Compensation Currency": "compensation_currency",
+    "Status": "status",
+}
+COLUMN_FIELDS = {column: field for field, column in FIELD_COLUMNS.items()}
+
+# Numeric pay parsed from Compensation; kept locally for filtering, never synced to Airtable
+PAY_COLUMNS = {
+    "pay_min": "REAL",
+    "pay_max": "REAL",
+    "pay_period": "TEXT",
+    "pay_currency": "TEXT",
+    "pay_annual_min_usd": "REAL",
+    "pay_annual_max_usd": "REAL",
+}
+
+# Sync bookkeeping for rows Airtable rejected; added to older stores by _migrate
+SYNC_COLUMNS = {
+    "sync_attempts": "INTEGER NOT NULL DEFAULT 0",
+    "sync_after": "REAL NOT NULL DEFAULT 0",
+    "sync_error": "TEXT",
+}
+
+# Airtable accepts 10 records per write and 5 requests per second per base
+AIRTABLE_BATCH_SIZE = 10
+AIRTABLE_REQUEST_INTERVAL = 0.2
+# A rejected row is retried after 1 minute, doubling up to 6 hours
+SYNC_RETRY_BASE = 60
+SYNC_RETRY_MAX = 6 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    table_id TEXT NOT NULL,
+    link TEXT NOT NULL,
+    title TEXT,
+    company TEXT,
+    location TEXT,
+    description TEXT,
+    snippet TEXT,
+    compensation TEXT,
+    compensation_currency TEXT,
+    status TEXT,
+    pay_min REAL,
+    pay_max REAL,
+    pay_period TEXT,
+    pay_currency TEXT,
+    pay_annual_min_usd REAL,
+    pay_annual_max_usd REAL,
+    posted_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    airtable_id TEXT,
+    dirty INTEGER NOT NULL DEFAULT 1,
+    sync_attempts INTEGER NOT NULL DEFAULT 0,
+    sync_after REAL NOT NULL DEFAULT 0,
+    sync_error TEXT,
+    UNIQUE (table_id, link)
+);
+CREATE INDEX IF NOT EXISTS jobs_link ON jobs (link);
+CREATE INDEX IF NOT EXISTS jobs_company ON jobs (company);
+CREATE INDEX IF NOT EXISTS jobs_posted_at ON jobs (posted_at);
+CREATE INDEX IF NOT EXISTS jobs_dirty ON jobs (table_id, dirty);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+    title, company, description, content='jobs', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS jobs_ai AFTER INSERT ON jobs BEGIN
+    INSERT INTO jobs_fts (rowid, title, company, description) VALUES (new.id, new.title, new.company, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS jobs_ad AFTER DELETE ON jobs BEGIN
+    INSERT INTO jobs_fts (jobs_fts, rowid, title, company, description) VALUES ('delete', old.id, old.title, old.company, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS jobs_au AFTER UPDATE OF title, company, description ON jobs BEGIN
+    INSERT INTO jobs_fts (jobs_fts, rowid, title, company, description) VALUES ('delete', old.id, old.title, old.company, old.description);
+    INSERT INTO jobs_fts (rowid, title, company, description) VALUES (new.id, new.title, new.company, new.description);
+END;
+"""
+
+
+class JobStore:
+    """
+    Local SQLite system of record for job listings.
+
+    Rows are keyed by (Airtable table id, link) and carry the Airtable field
+    values as columns, indexed on link, company and posted date, with FTS5
+    over title, company and description. Compensation is also parsed into
+    numeric pay columns (range, period, currency and annual USD), so pay can
+    be filtered with plain SQL. Writes mark rows dirty; an AirtableSync
+    pushes dirty rows to their Airtable table in batches.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('JOB_STORE', 'jobs.sqlite')
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """Add pay and sync columns to stores created before they existed, and fill in pay."""
+        existing = {row['name'] for row in self.conn.execute("PRAGMA table_info(jobs)")}
+        added = {**PAY_COLUMNS, **SYNC_COLUMNS}
+        missing = [column for column in added if column not in existing]
+        with self._lock, self.conn:
+            for column in missing:
+                self.conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {added[column]}")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_pay ON jobs (pay_annual_max_usd, pay_annual_min_usd)")
+        if any(column in PAY_COLUMNS for column in missing):
+            self.backfill_pay()
+
+    @staticmethod
+    def _pay_columns(jobs):
+        """Pay columns for a batch of jobs (Airtable field dicts), parsed in one vectorised pass."""
+        pay = normalize_compensation(
+            [job.get('Compensation') for job in jobs], [job.get('Compensation Currency') for job in jobs]
+        )
+        columns = []
+        for i in range(len(jobs)):
+            if pay['period'][i]:
+                columns.append({
+                    'pay_min': float(pay['min'][i]),
+                    'pay_max': float(pay['max'][i]),
+                    'pay_period': pay['period'][i],
+                    'pay_currency': pay['currency'][i],
+                    'pay_annual_min_usd': round(float(pay['annual_min_usd'][i]), 2),
+                    'pay_annual_max_usd': round(float(pay['annual_max_usd'][i]), 2),
+                })
+            else:
+                columns.append(dict.fromkeys(PAY_COLUMNS))
+        return columns
+
+    def backfill_pay(self):
+        """Re-parse every stored Compensation into the pay columns."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, compensation, compensation_currency FROM jobs WHERE compensation IS NOT NULL"
+            ).fetchall()
+            jobs = [{'Compensation': row['compensation'], 'Compensation Currency': row['compensation_currency']} for row in rows]
+            assignments = ', '.join(f"{column} = ?" for column in PAY_COLUMNS)
+            with self.conn:
+                self.conn.executemany(
+                    f"UPDATE jobs SET {assignments} WHERE id = ?",
+                    [(*pay.values(), row['id']) for row, pay in zip(rows, self._pay_columns(jobs))]
+                )
+        LOG.info(f"Parsed pay for {len(rows)} stored jobs")
+
+    @staticmethod
+    def _columns(fields):
+        return {FIELD_COLUMNS[field]: value for field, value in fields.items() if field in FIELD_COLUMNS}
+
+    @staticmethod
+    def _as_record(row):
+        fields = {field: row[column] for column, field in COLUMN_FIELDS.items() if row[column] is not None}
+        record = {'id': row['airtable_id'], 'fields': fields}
+        if row['pay_period']:
+            record['pay'] = {
+                'min': row['pay_min'], 'max': row['pay_max'],
+                'period': row['pay_period'], 'currency': row['pay_currency'],
+            }
+        return record
+
+    def existing_links(self, table_id):
+        with self._lock:
+            rows = self.conn.execute("SELECT link FROM jobs WHERE table_id = ?", (table_id,))
+            return {row['link'] for row in rows}
+
+    def count(self, table_id):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM jobs WHERE table_id = ?", (table_id,)).fetchone()[0]
+
+    def add_jobs(self, table_id, jobs):
+        """Insert jobs (Airtable field dicts) whose link isn't stored yet; returns the new ones."""
+        now = time.time()
+        added = []
+        pay = self._pay_columns(jobs)
+        with self._lock, self.conn:
+            for job, pay_columns in zip(jobs, pay):
+                columns = self._columns(job)
+                if not columns.get('link'):
+                    continue
+                columns.update(pay_columns)
+                names = ['table_id', 'posted_at', 'updated_at', *columns]
+                cursor = self.conn.execute(
+                    f"INSERT OR IGNORE INTO jobs ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+                    (table_id, now, now, *columns.values())
+                )
+                if cursor.rowcount:
+                    added.append(job)
+        return added
+
+    def update_jobs(self, table_id, updates):
+        """Apply {link: {field: value}} changes locally and mark the rows for sync."""
+        now = time.time()
+        repriced = [link for link, fields in updates.items() if 'Compensation' in fields]
+        pay = dict(zip(repriced, self._pay_columns([updates[link] for link in repriced])))
+        with self._lock, self.conn:
+            for link, fields in updates.items():
+                columns = self._columns(fields)
+                if not columns:
+                    continue
+                columns.update(pay.get(link, {}))
+                assignments = ', '.join(f"{column} = ?" for column in columns)
+                self.conn.execute(
+                    f"UPDATE jobs SET {assignments}, updated_at = ?, dirty = 1 WHERE table_id = ? AND link = ?",
+                    (*columns.values(), now, table_id, link)
+                )
+
+    def import_airtable_records(self, table_id, records):
+        """Seed the store from existing Airtable rows; these start out in sync."""
+        now = time.time()
+        pay = self._pay_columns([record.get('fields', {}) for record in records])
+        with self._lock, self.conn:
+            for record, pay_columns in zip(records, pay):
+                columns = self._columns(record.get('fields', {}))
+                if not columns.get('link'):
+                    continue
+                columns.update(pay_columns)
+                names = ['table_id', 'posted_at', 'updated_at', 'airtable_id', 'dirty', *columns]
+                self.conn.execute(
+                    f"INSERT OR IGNORE INTO jobs ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+                    (table_id, now, now, record.get('id'), 0, *columns.values())
+                )
+
+    def records(self, table_id, where="", params=()):
+        """Jobs as Airtable-shaped records ({'id', 'fields'}), oldest first."""
+        clause = f"AND ({where})" if where else ""
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT * FROM jobs WHERE table_id = ? {clause} ORDER BY posted_at, id", (table_id, *params)
+            ).fetchall()
+        return [self._as_record(row) for row in rows]
+
+    def search(self, query, table_id=None, limit=50):
+        """Full-text search over title, company and description, best matches first."""
+        clause = "AND jobs.table_id = ?" if table_id else ""
+        params = (query, table_id, limit) if table_id else (query, limit)
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT jobs.* FROM jobs_fts JOIN jobs ON jobs.id = jobs_fts.rowid "
+                f"WHERE jobs_fts MATCH ? {clause} ORDER BY rank LIMIT ?", params
+            ).fetchall()
+        return [self._as_record(row) for row in rows]
+
+    def dirty_rows(self, table_id, limit=500):
+        """Rows waiting to be pushed, leaving out rejected ones until their retry time."""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT * FROM jobs WHERE table_id = ? AND dirty = 1 AND sync_after <= ? ORDER BY id LIMIT ?",
+                (table_id, time.time(), limit)
+            ).fetchall()
+
+    def mark_synced(self, table_id, synced):
+        """Record Airtable ids for pushed rows; synced is [(link, airtable_id, updated_at)]."""
+        with self._lock, self.conn:
+            # Rows changed again while the push was in flight stay dirty
+            self.conn.executemany(
+                "UPDATE jobs SET airtable_id = ?, dirty = CASE WHEN updated_at > ? THEN 1 ELSE 0 END, "
+                "sync_attempts = 0, sync_after = 0, sync_error = NULL WHERE table_id = ? AND link = ?",
+                [(airtable_id, updated_at, table_id, link) for link, airtable_id, updated_at in synced]
+            )
+
+    def mark_failed(self, table_id, link, error):
+        """Keep a rejected row dirty but hold it back, with exponential backoff, and record why."""
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET sync_attempts = sync_attempts + 1, sync_error = ?, "
+                "sync_after = ? + MIN(? * (1 << MIN(sync_attempts, 16)), ?) WHERE table_id = ? AND link = ?",
+                (error, now, SYNC_RETRY_BASE, SYNC_RETRY_MAX, table_id, link)
+            )
+
+    def sync_errors(self, table_id):
+        """{link: error} for rows Airtable has rejected and that are still waiting to sync."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT link, sync_error FROM jobs WHERE table_id = ? AND dirty = 1 AND sync_error IS NOT NULL",
+                (table_id,)
+            ).fetchall()
+        return {row['link']: row['sync_error'] for row in rows}
+
+
+class AirtableSync:
+    """
+    Pushes dirty JobStore rows to an Airtable table from a background thread.
+
+    New rows go through batch_create and changed rows through batch_update,
+    10 records per request and no more than 5 requests per second. When
+    Airtable rejects a batch its rows are retried one by one, so a bad row
+    only holds back itself: it stays dirty with its error recorded and is
+    retried with backoff. Call stop() before exiting to flush what is left.
+    """
+
+    def __init__(self, store, table, table_id, interval=5.0):
+        self.store = store
+        self.table = table
+        self.table_id = table_id
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _fields(self, row):
+        return {field: row[column] for column, field in COLUMN_FIELDS.items() if row[column] is not None}
+
+    def push_once(self):
+        """Push one round of dirty rows; returns how many were synced."""
+        rows = self.store.dirty_rows(self.table_id)
+        creates = [row for row in rows if not row['airtable_id']]
+        updates = [row for row in rows if row['airtable_id']]
+        pushed = 0
+
+        for i in range(0, len(creates), AIRTABLE_BATCH_SIZE):
+            pushed += self._push_batch(creates[i:i + AIRTABLE_BATCH_SIZE], self._create)
+        for i in range(0, len(updates), AIRTABLE_BATCH_SIZE):
+            pushed += self._push_batch(updates[i:i + AIRTABLE_BATCH_SIZE], self._update)
+        return pushed
+
+    def _create(self, chunk):
+        created = self.table.batch_create([self._fields(row) for row in chunk])
+        return [record['id'] for record in created]
+
+    def _update(self, chunk):
+        self.table.batch_update([{'id': row['airtable_id'], 'fields': self._fields(row)} for row in chunk])
+        return [row['airtable_id'] for row in chunk]
+
+    def _push_batch(self, chunk, write):
+        """Write one batch and mark it synced; returns how many rows landed."""
+        try:
+            airtable_ids = write(chunk)
+        except Exception as e:
+            if len(chunk) > 1:
+                return sum(self._push_batch([row], write) for row in chunk)
+            LOG.error(f"Airtable rejected {chunk[0]['link']}, will retry later: {e}")
+            self.store.mark_failed(self.table_id, chunk[0]['link'], str(e))
+            return 0
+        finally:
+            time.sleep(AIRTABLE_REQUEST_INTERVAL)
+
+        # Each batch is marked as soon as it lands so a later failure never re-creates rows
+        self.store.mark_synced(self.table_id, [
+            (row['link'], airtable_id, row['updated_at']) for row, airtable_id in zip(chunk, airtable_ids)
+        ])
+        return len(chunk)
+
+    def flush(self):
+        total = 0
+        while True:
+            pushed = self.push_once()
+            total += pushed
+            if not pushed:
+                return total
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self.push_once():
+                    continue
+            except Exception as e:
+                LOG.error(f"Airtable sync failed, retrying in {self.interval}s: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='airtable-sync', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, flush=True):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if flush:
+            synced = self.flush()
+            LOG.info(f"Airtable sync flushed {synced} records")
+            rejected = self.store.sync_errors(self.table_id)
+            if rejected:
+                LOG.warning(f"{len(rejected)} records rejected by Airtable are still waiting to sync: {rejected}")
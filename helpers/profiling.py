@@ -0,0 +1,181 @@
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+LOG = logging.getLogger(__name__)
+LOG.setLevel(logging.INFO)
+
+
+def _thread_cpu_clock(thread_id):
+    """CPU clock id for another thread, or None where the platform can't provide one."""
+    try:
+        return time.pthread_getcpuclockid(thread_id)
+    except (AttributeError, OSError):
+        return None
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def add_profile_args(parser):
+    """Add the --profile/--profile-dir options every entry point shares."""
+    parser.add_argument('--profile', action='store_true', help="sample each stage and write flamegraph/hot-function reports")
+    parser.add_argument('--profile-dir', default=None, help="where profile output goes (default: $PROFILE_DIR or ./profiles)")
+
+
+class SamplingProfiler:
+    """
+    Low-overhead wall-clock sampler.
+
+    A background thread snapshots every other thread's Python stack each
+    `interval` seconds. Each sample is tagged [cpu] if the sampled thread's
+    CPU clock advanced since the previous sample and [wait] otherwise, so
+    time.sleep backoffs and network waits show up separately from parsing
+    and regex work.
+    """
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.samples = Counter()
+        self._clocks = {}
+        self._last_cpu = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _mode(self, thread_id):
+        if thread_id not in self._clocks:
+            self._clocks[thread_id] = _thread_cpu_clock(thread_id)
+        clock = self._clocks[thread_id]
+        if clock is None:
+            return 'all'
+        try:
+            cpu = time.clock_gettime(clock)
+        except OSError:  # thread exited between snapshot and read
+            return 'wait'
+        previous = self._last_cpu.get(thread_id, cpu)
+        self._last_cpu[thread_id] = cpu
+        return 'cpu' if cpu - previous > self.interval * 0.1 else 'wait'
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                # Idle pool workers would otherwise dominate the wait profile
+                if stack and stack[0].startswith('_worker (thread.py'):
+                    continue
+                stack.reverse()
+                self.samples[(self._mode(thread_id), tuple(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+class Profiler:
+    """
+    Per-stage profiling for the command-line entry points.
+
+    Usage:
+        profiler = Profiler(enabled=args.profile)
+        with profiler.stage('search'):
+            ...
+        profiler.report()
+
+    For each stage a collapsed-stack file (<stage>.collapsed, readable by
+    flamegraph.pl or speedscope) is written to `output_dir`, along with a
+    report.txt listing wall, CPU and wait time and the hottest functions.
+    When disabled every call is a no-op.
+    """
+
+    def __init__(self, enabled=False, output_dir=None, interval=None, top_n=20):
+        self.enabled = enabled
+        self.output_dir = output_dir or os.getenv('PROFILE_DIR', 'profiles')
+        self.interval = interval or float(os.getenv('PROFILE_INTERVAL', 0.01))
+        self.top_n = top_n
+        self.stages = []
+
+    @classmethod
+    def from_args(cls, args):
+        """Profiler configured from add_profile_args options."""
+        return cls(enabled=args.profile, output_dir=args.profile_dir)
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        sampler = SamplingProfiler(self.interval)
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            self.stages.append({
+                'name': name,
+                'wall': time.perf_counter() - wall_start,
+                'cpu': time.process_time() - cpu_start,
+                'samples': sampler.samples,
+            })
+
+    def _write_collapsed(self, stage):
+        path = os.path.join(self.output_dir, f"{stage['name']}.collapsed")
+        with open(path, 'w') as f:
+            for (mode, stack), count in stage['samples'].most_common():
+                f.write(f"{stage['name']};[{mode}];{';'.join(stack)} {count}\n")
+        return path
+
+    def _hot_functions(self, samples):
+        self_counts, total_counts = Counter(), Counter()
+        for (_, stack), count in samples.items():
+            if stack:
+                self_counts[stack[-1]] += count
+            for label in set(stack):
+                total_counts[label] += count
+        return self_counts.most_common(self.top_n), total_counts
+
+    def report(self):
+        """Write collapsed stacks and the top-N report; returns the report text."""
+        if not self.enabled or not self.stages:
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        lines = []
+        for stage in self.stages:
+            samples = stage['samples']
+            total = sum(samples.values()) or 1
+            by_mode = Counter()
+            for (mode, _), count in samples.items():
+                by_mode[mode] += count
+            path = self._write_collapsed(stage)
+            lines.append(
+                f"== {stage['name']}: wall {stage['wall']:.2f}s, process CPU {stage['cpu']:.2f}s, "
+                f"samples cpu {by_mode['cpu'] / total:.0%} / wait {by_mode['wait'] / total:.0%} ({path})"
+            )
+            hottest, inclusive = self._hot_functions(samples)
+            lines.append(f"{'self':>7} {'total':>7}  function")
+            for label, count in hottest:
+                lines.append(f"{count / total:>7.1%} {inclusive[label] / total:>7.1%}  {label}")
+            lines.append('')
+
+        text = '\n'.join(lines)
+        with open(os.path.join(self.output_dir, 'report.txt'), 'w') as f:
+            f.write(text)
+        LOG.info(f"Profile report written to {self.output_dir}\n{text}")
+        return text
@@ -0,0 +1,156 @@
+import os
+import re
+
+# Titles like "Jobs at Acme" or "Search 250 openings" are listing pages, not postings
+INDEX_PAGE_PATTERN = re.compile(
+    r'\b(?:jobs|careers|openings|positions|vacancies)\s+at\b'
+    r'|\b(?:current|open|all)\s+(?:openings|positions|jobs|roles)\b'
+    r'|\bsearch\s+(?:\d+\s+)?jobs\b'
+    r'|\b\d[\d,]*\s+(?:jobs|openings|positions)\b',
+    re.I
+)
+
+# Countries (with common aliases and big job-market cities) used to spot postings for somewhere
+# other than the configured LOCATIONS; a group is allowed if any of its names is configured
+PLACE_GROUPS = [
+    ('united states', 'usa', 'u.s.', 'new york', 'san francisco', 'seattle', 'austin', 'boston', 'chicago'),
+    ('canada', 'toronto', 'vancouver', 'montreal'),
+    ('mexico', 'mexico city'),
+    ('brazil', 'sao paulo', 'são paulo'),
+    ('argentina', 'buenos aires'),
+    ('colombia', 'bogota', 'bogotá'),
+    ('chile', 'santiago'),
+    ('united kingdom', 'uk', 'england', 'scotland', 'london', 'manchester'),
+    ('ireland', 'dublin'),
+    ('germany', 'berlin', 'munich'),
+    ('france', 'paris'),
+    ('spain', 'madrid', 'barcelona'),
+    ('portugal', 'lisbon'),
+    ('italy', 'milan', 'rome'),
+    ('netherlands', 'amsterdam'),
+    ('belgium', 'brussels'),
+    ('switzerland', 'zurich'),
+    ('austria', 'vienna'),
+    ('sweden', 'stockholm'),
+    ('norway', 'oslo'),
+    ('denmark', 'copenhagen'),
+    ('finland', 'helsinki'),
+    ('poland', 'warsaw', 'krakow'),
+    ('romania', 'bucharest'),
+    ('ukraine', 'kyiv'),
+    ('israel', 'tel aviv'),
+    ('united arab emirates', 'uae', 'dubai'),
+    ('india', 'bangalore', 'bengaluru', 'hyderabad', 'pune', 'mumbai'),
+    ('pakistan', 'karachi', 'lahore'),
+    ('philippines', 'manila'),
+    ('singapore',),
+    ('japan', 'tokyo'),
+    ('china', 'shanghai', 'beijing'),
+    ('south korea', 'seoul'),
+    ('australia', 'sydney', 'melbourne'),
+    ('new zealand', 'auckland'),
+    ('south africa', 'cape town', 'johannesburg'),
+    ('nigeria', 'lagos'),
+    ('kenya', 'nairobi'),
+    ('egypt', 'cairo'),
+]
+
+# Short location names that are too ambiguous to scan for ("join us") but fine to configure
+LOCATION_ALIASES = {'us': 'united states', 'u.s.': 'united states', 'gb': 'united kingdom'}
+
+# Multiplier for items that name only places outside LOCATIONS
+WRONG_PLACE_PENALTY = 0.5
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9+#]+')
+
+# Words that carry no signal on their own when comparing role names
+STOPWORDS = {'a', 'an', 'and', 'the', 'of', 'for', 'in', 'at', 'to', 'sr', 'jr', 'senior', 'junior', 'remote'}
+
+
+def _tokens(text):
+    return {token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS}
+
+
+def _phrase_pattern(phrases):
+    """One alternation regex over every phrase, longest first, on word boundaries."""
+    phrases = sorted({phrase.strip().lower() for phrase in phrases if phrase.strip()}, key=len, reverse=True)
+    if not phrases:
+        return None
+    return re.compile(r'(?<![a-z0-9])(?:' + '|'.join(re.escape(phrase) for phrase in phrases) + r')(?![a-z0-9])')
+
+
+class RelevanceFilter:
+    """
+    Cheap title/snippet scoring against the configured roles and locations.
+
+    All role and location phrases are compiled once into a single
+    alternation regex each, so scoring an item is one scan per pattern
+    regardless of how many roles are configured. Items without an exact role
+    phrase fall back to the best token overlap with any role. Listing pages
+    ("Jobs at X", "250 open positions") are heavily penalised, and so are
+    items that name a country or city outside the configured locations
+    without naming any configured one.
+    """
+
+    def __init__(self, roles, locations, threshold=None):
+        self.threshold = float(os.getenv('RELEVANCE_THRESHOLD', 0.5)) if threshold is None else threshold
+        self.role_pattern = _phrase_pattern(roles)
+        self.location_pattern = _phrase_pattern(locations)
+        self.role_token_sets = [tokens for tokens in (_tokens(role) for role in roles) if tokens]
+        self.other_place_pattern = self._other_place_pattern(locations) if self.location_pattern else None
+
+    def _other_place_pattern(self, locations):
+        """Places in PLACE_GROUPS whose group shares no name with the configured locations."""
+        configured = [LOCATION_ALIASES.get(location.strip().lower(), location.strip().lower())
+                      for location in locations if location.strip()]
+        configured_pattern = _phrase_pattern(configured)
+
+        def allowed(group):
+            return any(configured_pattern.search(place) or _phrase_pattern([place]).search(' | '.join(configured))
+                       for place in group)
+
+        return _phrase_pattern([place for group in PLACE_GROUPS if not allowed(group) for place in group])
+
+    def _role_score(self, title, text):
+        if self.role_pattern is None:
+            return 1.0
+        if self.role_pattern.search(title):
+            return 1.0
+        if self.role_pattern.search(text):
+            return 0.8
+        tokens = _tokens(text)
+        best = max((len(role & tokens) / len(role) for role in self.role_token_sets), default=0.0)
+        return 0.6 * best
+
+    def _location_score(self, text):
+        if self.location_pattern is None:
+            return 1.0
+        if self.location_pattern.search(text):
+            return 1.0
+        # Missing location is common in snippets, so it is not treated as a mismatch
+        return 0.5
+
+    def _wrong_place(self, text):
+        return (self.other_place_pattern is not None and self.location_pattern is not None
+                and not self.location_pattern.search(text) and bool(self.other_place_pattern.search(text)))
+
+    def score(self, title, snippet):
+        title = (title or '').lower()
+        text = f"{title} {(snippet or '').lower()}"
+        score = 0.7 * self._role_score(title, text) + 0.3 * self._location_score(text)
+        if INDEX_PAGE_PATTERN.search(title):
+            score *= 0.2
+        if self._wrong_place(text):
+            score *= WRONG_PLACE_PENALTY
+        return score
+
+    def score_batch(self, items):
+        """Scores for a page of CSE items (dicts with 'title' and 'snippet')."""
+        return [self.score(item.get('title', ''), item.get('snippet', '')) for item in items]
+
+    def split(self, items):
+        """Partition items into (relevant, rejected) by the threshold."""
+        relevant, rejected = [], []
+        for item, score in zip(items, self.score_batch(items)):
+            (relevant if score >= self.threshold else rejected).append(item)
+        return relevant, rejected
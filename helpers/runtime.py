@@ -0,0 +1,101 @@
+import atexit
+import logging
+import os
+from functools import lru_cache
+
+LOG = logging.getLogger(__name__)
+
+# Enriched listings table: search results with full descriptions, and ATS postings
+ENRICHED_BASE_ID = 'app816KaoBp3EZKwg'
+ENRICHED_TABLE_ID = 'tbla1yH8WjUmcrqYf'
+
+_configured = False
+_syncs = {}
+
+
+def configure():
+    """
+    Load .env and set up logging. Entry points call this first; nothing in
+    the package does it at import time, so env-dependent clients are always
+    built after the .env values are visible.
+    """
+    global _configured
+    if _configured:
+        return
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    logging.basicConfig(
+        level=getattr(logging, os.getenv('LOG_LEVEL', 'INFO')),
+        format='%(asctime)s - %(message)s',
+        datefmt='%H:%M:%S'
+    )
+    _configured = True
+
+
+@lru_cache(maxsize=None)
+def airtable_table(base_id, table_id):
+    """pyairtable table, created on first use and reused afterwards."""
+    from pyairtable import Api
+
+    return Api(os.getenv('AIR_TABLE_API', 'default_value')).table(base_id, table_id)
+
+
+@lru_cache(maxsize=None)
+def job_store():
+    """Process-wide local JobStore."""
+    from helpers.job_store import JobStore
+
+    return JobStore()
+
+
+def synced_store(base_id, table_id, seed_records=None):
+    """
+    JobStore for an Airtable table, with a background AirtableSync running
+    for it. The first time a table is seen locally it is seeded from
+    Airtable (`seed_records`, or the whole table via pyairtable).
+    """
+    from helpers.job_store import AirtableSync
+
+    store = job_store()
+    if not store.count(table_id):
+        records = seed_records() if seed_records else airtable_table(base_id, table_id).all()
+        store.import_airtable_records(table_id, records)
+
+    if not _syncs:
+        atexit.register(flush_syncs)
+    if table_id not in _syncs:
+        _syncs[table_id] = AirtableSync(store, airtable_table(base_id, table_id), table_id).start()
+    return store
+
+
+def save_listings(data, base_id=ENRICHED_BASE_ID, table_id=ENRICHED_TABLE_ID):
+    """
+    Add new jobs to the local store for a table (the enriched listings by
+    default); the background sync pushes them to Airtable. Returns whether
+    the jobs were stored.
+    """
+    try:
+        store = synced_store(base_id, table_id)
+        new_jobs = store.add_jobs(table_id, data)
+
+        if new_jobs:
+            LOG.info(f"✅ Saved {len(new_jobs)} new job listings (syncing to Airtable)")
+        else:
+            LOG.info("ℹ️ No new job listings to save")
+        return True
+
+    except Exception as e:
+        LOG.error(f"❌ Error saving to Airtable: {e}")
+        return False
+
+
+def flush_syncs():
+    """Stop background syncs and push whatever is still pending; runs at exit."""
+    while _syncs:
+        table_id, sync = _syncs.popitem()
+        # One table failing to flush must not keep the others from flushing
+        try:
+            sync.stop(flush=True)
+        except Exception as e:
+            LOG.error(f"Airtable sync for {table_id} failed to flush: {e}")
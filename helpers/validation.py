@@ -1,14 +1,15 @@
+import codecs
 import re
-import requests
-from bs4 import BeautifulSoup
 import logging
 import os
+import time
+from functools import lru_cache
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from html.parser import HTMLParser
+from urllib.parse import urlparse
+
+from helpers.circuit_breaker import DomainCircuitBreakers, LatencyTracker
 
-logging.basicConfig(
-    level=getattr(logging, os.getenv('LOG_LEVEL', 'INFO')),
-    format='%(asctime)s - %(message)s',
-    datefmt='%H:%M:%S'
-)
 logger = logging.getLogger(__name__)
 
 
@@ -194,46 +195,252 @@ def determine_currency(compensation_text, description_text):
     return 'N/A'
 
 
-def fetch_full_description(url):
-    """Fetch and parse the full job description from the job posting URL."""
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+STREAM_CHUNK_BYTES = 16 * 1024
+
+FETCH_LATENCY = LatencyTracker()
+
+
+# Built on first use so FETCH_* settings from .env are already loaded
+@lru_cache(maxsize=None)
+def domain_breakers():
+    """Shared across fetches so one dead job-site domain stops costing a full timeout per link."""
+    return DomainCircuitBreakers(
+        failure_threshold=int(os.getenv('FETCH_BREAKER_FAILURES', 3)),
+        cooldown_seconds=float(os.getenv('FETCH_BREAKER_COOLDOWN', 300))
+    )
+
+
+@lru_cache(maxsize=None)
+def _hedge_pool():
+    return ThreadPoolExecutor(max_workers=int(os.getenv('FETCH_HEDGE_WORKERS', 8)))
+
+DESCRIPTION_CLASS_PATTERN = re.compile(r'job-description|description|details|posting-details', re.I)
+DESCRIPTION_ID_PATTERN = re.compile(r'job-description|description|details', re.I)
+
+
+def hedged_call(fetch, url, timeout=10, hedge_after=None):
+    """
+    Run fetch(url, timeout), starting a second identical call if the first
+    is still running after `hedge_after` seconds. The first success wins.
+    """
+    primary = _hedge_pool().submit(fetch, url, timeout)
+    if hedge_after is None or hedge_after >= timeout:
+        return primary.result()
+
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Remove script, style, and nav elements
-            for element in soup(['script', 'style', 'nav', 'header', 'footer']):
-                element.decompose()
-            
-            # Look for common job description containers
-            description = None
-            selectors = [
-                ['div', {'class': re.compile(r'job-description|description|details|posting-details', re.I)}],
-                ['section', {'class': re.compile(r'job-description|description|details', re.I)}],
-                ['div', {'id': re.compile(r'job-description|description|details', re.I)}],
-                ['article'],
-                ['main']
-            ]
-            
-            for tag, attrs in selectors:
-                if description:
-                    break
-                elements = soup.find_all(tag, attrs) if attrs else soup.find_all(tag)
-                if elements:
-                    text = elements[0].get_text(separator=' ', strip=True)
-                    if len(text) > 100:  # Ensure we have substantial content
-                        description = text
-            
-            if description:
-                # Clean up the text
-                description = re.sub(r'\s+', ' ', description)  # Normalize whitespace
-                description = re.sub(r'[^\w\s.,;!?-]', '', description)  # Remove special characters
-                return description
-            
+        return primary.result(timeout=hedge_after)
+    except FutureTimeout:
+        logger.debug(f"Hedging request to {url} after {hedge_after:.2f}s")
+
+    hedge = _hedge_pool().submit(fetch, url, timeout)
+    pending = {primary, hedge}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+def clean_description(description):
+    description = re.sub(r'\s+', ' ', description)  # Normalize whitespace
+    description = re.sub(r'[^\w\s.,;!?-]', '', description)  # Remove special characters
+    return description.strip()
+
+
+def parse_description(html):
+    """Pull the job description text out of a page's HTML."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Remove script, style, and nav elements
+    for element in soup(['script', 'style', 'nav', 'header', 'footer']):
+        element.decompose()
+
+    # Look for common job description containers
+    description = None
+    selectors = [
+        ['div', {'class': DESCRIPTION_CLASS_PATTERN}],
+        ['section', {'class': DESCRIPTION_ID_PATTERN}],
+        ['div', {'id': DESCRIPTION_ID_PATTERN}],
+        ['article'],
+        ['main']
+    ]
+
+    for tag, *attrs in selectors:
+        if description:
+            break
+        elements = soup.find_all(tag, attrs[0]) if attrs else soup.find_all(tag)
+        if elements:
+            text = elements[0].get_text(separator=' ', strip=True)
+            if len(text) > 100:  # Ensure we have substantial content
+                description = text
+
+    return clean_description(description) if description else None
+
+
+class DescriptionScanner(HTMLParser):
+    """
+    Incremental parser that watches for the first substantial description
+    container (a div/section whose class or id looks like a job description)
+    and sets `description` as soon as that container closes, so the caller
+    can stop downloading the rest of the page.
+    """
+
+    SKIPPED_TAGS = {'script', 'style', 'nav', 'header', 'footer'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.description = None
+        self._container_tag = None
+        self._depth = 0
+        self._skip_depth = 0
+        self._parts = []
+
+    def _is_container(self, tag, attrs):
+        if tag not in ('div', 'section'):
+            return False
+        attrs = dict(attrs)
+        return bool(
+            DESCRIPTION_CLASS_PATTERN.search(attrs.get('class') or '')
+            or DESCRIPTION_ID_PATTERN.search(attrs.get('id') or '')
+        )
+
+    def handle_starttag(self, tag, attrs):
+        if self.description:
+            return
+        if self._container_tag is None:
+            if self._is_container(tag, attrs):
+                self._container_tag, self._depth, self._parts = tag, 1, []
+            return
+        if tag == self._container_tag:
+            self._depth += 1
+        if tag in self.SKIPPED_TAGS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if self._container_tag is None or self.description:
+            return
+        if tag in self.SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        if tag != self._container_tag:
+            return
+        self._depth -= 1
+        if self._depth == 0:
+            text = ' '.join(self._parts)
+            if len(text) > 100:  # Same bar as parse_description
+                self.description = text
+            # Too short: keep scanning for the next candidate container
+            self._container_tag = None
+
+    def handle_data(self, data):
+        if self._container_tag is not None and not self._skip_depth and data.strip():
+            self._parts.append(data.strip())
+
+
+def stream_description(url, timeout=10, max_bytes=None):
+    """
+    Download a job page in chunks and return (status_code, description).
+
+    Non-HTML responses are rejected from their headers before any body is
+    read. The body is decoded incrementally and fed to a DescriptionScanner;
+    reading stops as soon as the description container closes, when
+    `max_bytes` have been read or when `timeout` seconds have passed. If no
+    container closed early, whatever was read goes through parse_description.
+    """
+    import requests
+
+    max_bytes = max_bytes or int(os.getenv('FETCH_MAX_BYTES', MAX_PAGE_BYTES))
+    started = time.monotonic()
+    with requests.get(url, headers=REQUEST_HEADERS, timeout=timeout, stream=True) as response:
+        if response.status_code != 200:
+            return response.status_code, None
+
+        content_type = response.headers.get('Content-Type', '')
+        mime_type = content_type.split(';')[0].strip().lower()
+        if mime_type and mime_type not in HTML_CONTENT_TYPES:
+            logger.info(f"Skipping {url}: content type {mime_type}")
+            return response.status_code, None
+
+        # requests assumes ISO-8859-1 for text/* without a charset; pages are overwhelmingly UTF-8
+        encoding = response.encoding if 'charset' in content_type.lower() else 'utf-8'
+        try:
+            decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        except LookupError:
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+        scanner = DescriptionScanner()
+        chunks = []
+        received = 0
+        for chunk in response.iter_content(chunk_size=STREAM_CHUNK_BYTES):
+            received += len(chunk)
+            text = decoder.decode(chunk)
+            chunks.append(text)
+            scanner.feed(text)
+            if scanner.description:
+                return response.status_code, clean_description(scanner.description)
+            if received >= max_bytes:
+                logger.info(f"Stopped reading {url} at the {max_bytes} byte limit")
+                break
+            if time.monotonic() - started > timeout:
+                logger.info(f"Stopped reading {url} after {timeout}s")
+                break
+
+    return 200, parse_description(''.join(chunks))
+
+
+def _buffered_description(url, timeout=10):
+    import requests
+
+    response = requests.get(url, headers=REQUEST_HEADERS, timeout=timeout)
+    if response.status_code != 200:
+        return response.status_code, None
+    return response.status_code, parse_description(response.text)
+
+
+def fetch_full_description(url, timeout=10, hedge_percentile=None, stream=True):
+    """
+    Fetch and parse the full job description from the job posting URL.
+
+    Hosts that keep failing are skipped while their circuit breaker is open.
+    With `hedge_percentile` set (e.g. 95), a hedged second request is sent
+    once the fetch runs longer than that percentile of recent fetch latencies.
+    `stream=False` reads the whole page before parsing instead of streaming.
+    """
+    import requests
+
+    domain = urlparse(url).netloc
+    if not domain_breakers().allow(domain):
+        logger.info(f"Skipping {url}: circuit open for {domain}")
         return None
-    except Exception as e:
+
+    fetch = stream_description if stream else _buffered_description
+    hedge_after = FETCH_LATENCY.percentile(hedge_percentile) if hedge_percentile else None
+    started = time.monotonic()
+    try:
+        status_code, description = hedged_call(fetch, url, timeout=timeout, hedge_after=hedge_after)
+    except requests.exceptions.RequestException as e:
+        domain_breakers().record_failure(domain)
         logger.warning(f"Could not fetch full description from {url}: {e}")
-        return None
\ No newline at end of file
+        return None
+    except Exception as e:
+        # The host answered; the page just didn't parse. Still settle the breaker so a half-open trial ends.
+        domain_breakers().record_success(domain)
+        logger.warning(f"Could not parse full description from {url}: {e}")
+        return None
+    FETCH_LATENCY.record(time.monotonic() - started)
+
+    if status_code == 429 or status_code >= 500:
+        domain_breakers().record_failure(domain)
+        return None
+    domain_breakers().record_success(domain)
+    return description
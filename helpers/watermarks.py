@@ -0,0 +1,98 @@
+import fcntl
+import json
+import logging
+import os
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+LOG = logging.getLogger(__name__)
+LOG.setLevel(logging.INFO)
+
+# Links remembered per query; enough to recognise several weeks of repeat results
+MAX_LINKS_PER_QUERY = 5000
+
+
+class WatermarkStore:
+    """
+    Per-query search watermarks persisted as JSON.
+
+    Each (site, roles, locations) query keeps the time of its last complete
+    crawl and the links it has already returned, so a delta run can restrict
+    results by date and stop paging once nothing new comes back.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('SEARCH_WATERMARK_FILE', 'search_watermarks.json')
+        self.entries = self._load()
+        self._touched = set()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError as e:
+            LOG.warning(f"Ignoring unreadable watermark file {self.path}: {e}")
+            return {}
+
+    @contextmanager
+    def _locked(self):
+        with open(f"{self.path}.lock", 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def save(self):
+        """
+        Write the queries updated by this instance, merged into whatever is on
+        disk, so concurrent search workers don't overwrite each other's keys.
+        """
+        if not self._touched:
+            return
+        with self._locked():
+            entries = self._load()
+            entries.update({key: self.entries[key] for key in self._touched})
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(entries, f, indent=2)
+            os.replace(tmp_path, self.path)
+        self.entries = entries
+        self._touched.clear()
+
+    @staticmethod
+    def key(site, roles, locations):
+        roles = sorted(role.strip().lower() for role in roles if role.strip())
+        locations = sorted(location.strip().lower() for location in locations if location.strip())
+        return f"{site.strip().lower()}|{','.join(roles)}|{','.join(locations)}"
+
+    def known_links(self, key):
+        return set(self.entries.get(key, {}).get('links', []))
+
+    def search_params(self, key, now=None, slack_days=1):
+        """
+        CSE params that limit a query to results newer than its watermark.
+        Returns {} when the query has never completed a crawl.
+        """
+        last_run = self.entries.get(key, {}).get('last_run')
+        if not last_run:
+            return {}
+        now = now or datetime.now(timezone.utc)
+        days = (now - datetime.fromisoformat(last_run)).days + slack_days
+        return {'dateRestrict': f'd{max(days, 1)}', 'sort': 'date'}
+
+    def update(self, key, links, run_started, complete=True):
+        """
+        Remember `links` for the query. The watermark time only moves forward
+        when the query was paged to completion, so an interrupted crawl is
+        picked up again by the next run's date window.
+        """
+        self._touched.add(key)
+        entry = self.entries.setdefault(key, {'last_run': None, 'links': []})
+        seen = set(entry['links'])
+        entry['links'].extend(link for link in links if link not in seen)
+        entry['links'] = entry['links'][-MAX_LINKS_PER_QUERY:]
+        if complete:
+            entry['last_run'] = run_started.isoformat()
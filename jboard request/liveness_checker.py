@@ -0,0 +1,213 @@
+import asyncio
+import json
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+import requests
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from helpers.async_api_helper import async_request
+from helpers.concurrency import AsyncAdaptiveLimiter
+from helpers.runtime import configure, synced_store
+from send_to_jboard import JobPostingSystem
+
+ALIVE, CLOSED, UNKNOWN = 'alive', 'closed', 'unknown'
+
+# ATSs that signal a closed posting through status code or redirect, so HEAD is enough
+HEAD_ONLY_HOSTS = ('greenhouse.io', 'lever.co')
+
+# A closed posting redirects back to the company's board root (or an error page)
+CLOSED_REDIRECT_PATTERNS = [
+    re.compile(r'greenhouse\.io/[^/]+/?(?:\?.*error=true.*)?$'),
+    re.compile(r'jobs\.lever\.co/[^/]+/?(?:\?.*)?$'),
+    re.compile(r'jobs\.ashbyhq\.com/[^/]+/?(?:\?.*)?$'),
+    re.compile(r'[?&]error=true'),
+]
+
+CLOSED_TEXT_PATTERN = re.compile(
+    r'no longer accepting applications|job (?:is )?no longer available|position has been filled'
+    r'|this job has expired|job (?:posting )?(?:was )?not found|posting has been closed|job is closed',
+    re.I
+)
+
+# Only the top of the page is scanned for "job closed" banners
+BODY_SCAN_BYTES = 64 * 1024
+
+
+class VisibleTextScanner(HTMLParser):
+    """Collects the page text a reader would see, leaving out scripts, styles and templates."""
+
+    SKIPPED_TAGS = {'script', 'style', 'noscript', 'template'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._skip_depth = 0
+        self._parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED_TAGS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self._skip_depth and data.strip():
+            self._parts.append(data.strip())
+
+    @property
+    def text(self):
+        return ' '.join(self._parts)
+
+
+def visible_text(html: str) -> str:
+    scanner = VisibleTextScanner()
+    scanner.feed(html)
+    return scanner.text
+
+
+def redirected_to_closed(original_url: str, final_url: str) -> bool:
+    if final_url.rstrip('/') == original_url.rstrip('/'):
+        return False
+    return any(pattern.search(final_url) for pattern in CLOSED_REDIRECT_PATTERNS)
+
+
+class LivenessChecker:
+    """
+    Check posted job links in bulk and report which have closed.
+
+    Greenhouse and Lever links are checked with HEAD; everything else uses a
+    GET, made conditional with the ETag/Last-Modified seen on the previous
+    run so unchanged pages come back as 304 without a body. A link is closed
+    on 404/410, on a redirect to the board root, or on a "job closed" banner
+    in the visible text of the first BODY_SCAN_BYTES (scripts and inline JSON
+    are ignored, and the rest of the page is never downloaded).
+    Timeouts, 5xx and other surprises are UNKNOWN and never expire a job.
+    """
+
+    def __init__(self, cache_file: Optional[str] = None, concurrency: int = 50):
+        self.cache_file = cache_file or os.getenv('LIVENESS_CACHE', 'liveness_cache.json')
+        self.concurrency = concurrency
+        try:
+            with open(self.cache_file, 'r') as f:
+                self.cache = json.load(f)
+        except FileNotFoundError:
+            self.cache = {}
+
+    def _save_cache(self):
+        with open(self.cache_file, 'w') as f:
+            json.dump(self.cache, f)
+
+    async def _check(self, session, limiter, url: str) -> str:
+        host = urlparse(url).netloc
+        if host.endswith(HEAD_ONLY_HOSTS):
+            response = await async_request(session, url, method='head', limiter=limiter,
+                                           allow_redirects=True, max_retries=2, deadline=30)
+            if response.status_code in (404, 410) or redirected_to_closed(url, response.url):
+                return CLOSED
+            if response.status_code == 200:
+                return ALIVE
+            if response.status_code not in (405, 501):
+                return UNKNOWN
+
+        cached = self.cache.get(url, {})
+        headers = {}
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+
+        response = await async_request(session, url, method='get', limiter=limiter, headers=headers,
+                                       allow_redirects=True, max_retries=2, deadline=30, max_bytes=BODY_SCAN_BYTES)
+        if response.status_code == 304:
+            return cached.get('state', ALIVE)
+        if response.status_code in (404, 410) or redirected_to_closed(url, response.url):
+            return CLOSED
+        if response.status_code != 200:
+            return UNKNOWN
+
+        state = CLOSED if CLOSED_TEXT_PATTERN.search(visible_text(response.text)) else ALIVE
+        self.cache[url] = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'state': state,
+        }
+        return state
+
+    async def check_async(self, urls: List[str]) -> Dict[str, str]:
+        limiter = AsyncAdaptiveLimiter(initial=4, max_limit=16)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+
+        async def run(url):
+            async with semaphore:
+                try:
+                    return url, await self._check(session, limiter, url)
+                except (asyncio.TimeoutError, aiohttp.ClientError, ValueError):
+                    return url, UNKNOWN
+
+        async with aiohttp.ClientSession(connector=connector) as session:
+            results = dict(await asyncio.gather(*(run(url) for url in set(urls))))
+        self._save_cache()
+        return results
+
+    def check(self, urls: List[str]) -> Dict[str, str]:
+        return asyncio.run(self.check_async(urls))
+
+
+def cleanup_expired_jobs(workers: int = 8):
+    """Expire closed postings on Jboard and mark their jobs Expired in the local store."""
+    job_system = JobPostingSystem()
+    try:
+        jboard_jobs = job_system.fetch_jobs_from_jboard()
+    except requests.exceptions.RequestException as e:
+        print(f"Error listing Jboard jobs, cleanup skipped: {e}")
+        return
+    jboard_by_link = {job.get('apply_to') or job.get('link'): job for job in jboard_jobs}
+    jboard_by_link.pop(None, None)
+    print(f"Checking {len(jboard_by_link)} posted links...")
+
+    states = LivenessChecker().check(list(jboard_by_link))
+    closed_links = {link for link, state in states.items() if state == CLOSED}
+    unknown = sum(1 for state in states.values() if state == UNKNOWN)
+    print(f"{len(closed_links)} closed, {unknown} could not be checked")
+
+    closed_links = sorted(closed_links)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(job_system.expire_job_on_jboard, [jboard_by_link[link]['id'] for link in closed_links])
+        expired_links = {link for link, ok in zip(closed_links, results) if ok}
+    print(f"Expired {len(expired_links)} Jboard jobs")
+    not_expired = [link for link in closed_links if link not in expired_links]
+    if not_expired:
+        # Left unmarked locally so the next cleanup checks and expires them again
+        print(f"{len(not_expired)} closed jobs could not be expired on Jboard: {', '.join(not_expired)}")
+
+    # The local store is the system of record; its background sync pushes the new status to Airtable
+    table_id = job_system.AIRTABLE_TABLE_ID
+    try:
+        store = synced_store(job_system.AIRTABLE_BASE_ID, table_id, seed_records=job_system.fetch_jobs_from_airtable)
+    except requests.exceptions.RequestException as e:
+        print(f"Error loading jobs from Airtable, {len(expired_links)} expired jobs not marked: {e}")
+        return
+    newly_expired = {
+        record['fields']['Link']: {"Status": "Expired"}
+        for record in store.records(table_id, "status IS NULL OR status != 'Expired'")
+        if record['fields']['Link'] in expired_links
+    }
+    store.update_jobs(table_id, newly_expired)
+    print(f"Marked {len(newly_expired)} jobs as expired (syncing to Airtable)")
+
+
+def main():
+    configure()
+    cleanup_expired_jobs()
+
+if __name__ == "__main__":
+    main()
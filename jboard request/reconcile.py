@@ -0,0 +1,184 @@
+import argparse
+import html
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import requests
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from helpers.profiling import Profiler, add_profile_args
+from helpers.runtime import configure, synced_store
+from send_to_jboard import JobPostingSystem
+
+# Payload fields that are pushed to Jboard again when they change locally
+SYNCED_FIELDS = (
+    'title', 'description',
+    'min_compensation', 'max_compensation', 'compensation_currency', 'compensation_time_frame',
+)
+
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+
+def _normalized(value):
+    """Compare values the way Jboard stores them: HTML-insensitive text, numbers as floats."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = ' '.join(html.unescape(TAG_PATTERN.sub(' ', str(value))).split())
+    try:
+        return float(text)
+    except ValueError:
+        return text.lower()
+
+
+def _jboard_expired(job: Dict, now: datetime) -> bool:
+    """Whether Jboard's expires_at has passed; `now` is aware, and naive timestamps are taken as UTC."""
+    expires_at = job.get('expires_at')
+    if not expires_at:
+        return False
+    try:
+        expires = datetime.fromisoformat(str(expires_at).replace('Z', '+00:00'))
+    except ValueError:
+        return False
+    if expires.tzinfo is None:
+        expires = expires.replace(tzinfo=timezone.utc)
+    return expires <= now
+
+
+class Reconciler:
+    """
+    Bring Jboard in line with the local job set in one pass.
+
+    Jboard is paged through once and indexed by link. Each local job that is
+    not Expired is then a create (no Jboard job for its link) or, if any of
+    SYNCED_FIELDS differ, an update carrying only the changed fields. Live
+    Jboard jobs whose link is Expired locally are expired; with
+    `expire_unknown`, so are jobs missing from the local set (off by default,
+    since hand-posted jobs and other tables' jobs are unknown here). API
+    calls grow with the number of changes, not with the size of the board.
+    If either listing fails the run is aborted rather than diffed against a
+    partial set.
+    """
+
+    def __init__(self, job_system: Optional[JobPostingSystem] = None, workers: int = 8, expire_unknown: bool = False):
+        self.job_system = job_system or JobPostingSystem()
+        self.workers = workers
+        self.expire_unknown = expire_unknown
+
+    def diff(self, local_jobs: List[Dict], jboard_jobs: List[Dict]) -> Dict[str, list]:
+        """Plan {'create': [payload], 'update': [(id, link, changes)], 'expire': [(id, link)], 'posted': [link]}."""
+        now = datetime.now(timezone.utc)
+        posted_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        jboard_by_link = {}
+        for job in jboard_jobs:
+            link = job.get('apply_to') or job.get('link')
+            if link:
+                jboard_by_link[link] = job
+
+        plan = {'create': [], 'update': [], 'expire': [], 'posted': []}
+        expired_links = set()
+        for record in local_jobs:
+            fields = record.get('fields', {})
+            link = fields.get('Link')
+            if not link:
+                continue
+            if fields.get('Status') == 'Expired':
+                expired_links.add(link)
+                continue
+
+            existing = jboard_by_link.get(link)
+            if existing is None:
+                job_data = self.job_system.build_job_data(fields, posted_at, record.get('pay'))
+                if job_data:
+                    plan['create'].append(job_data)
+                continue
+
+            if fields.get('Status') != 'Posted':
+                plan['posted'].append(link)
+            desired = self.job_system.build_job_data(fields, posted_at, record.get('pay')) or {}
+            changes = {
+                field: desired[field] for field in SYNCED_FIELDS
+                if field in desired and _normalized(desired[field]) != _normalized(existing.get(field))
+            }
+            if changes:
+                plan['update'].append((existing['id'], link, changes))
+
+        local_links = {record.get('fields', {}).get('Link') for record in local_jobs}
+        for link, job in jboard_by_link.items():
+            if _jboard_expired(job, now):
+                continue
+            if link in expired_links or (self.expire_unknown and link not in local_links):
+                plan['expire'].append((job['id'], link))
+        return plan
+
+    def apply(self, plan: Dict[str, list]) -> Dict[str, list]:
+        """Run the planned calls concurrently; returns the links each kind succeeded for."""
+        system = self.job_system
+        calls = (
+            [('create', job['link'], system.post_job_to_jboard, (job,)) for job in plan['create']]
+            + [('update', link, system.update_job_on_jboard, (job_id, changes)) for job_id, link, changes in plan['update']]
+            + [('expire', link, system.expire_job_on_jboard, (job_id,)) for job_id, link in plan['expire']]
+        )
+        done = {'create': [], 'update': [], 'expire': []}
+        # Jboard rate limits are handled per host by the shared limiter behind api_helper
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [(kind, link, pool.submit(call, *call_args)) for kind, link, call, call_args in calls]
+            for kind, link, future in futures:
+                try:
+                    ok = future.result()
+                except Exception as e:
+                    print(f"ERROR: {kind} failed for {link}: {e}")
+                    continue
+                if ok:
+                    done[kind].append(link)
+        return done
+
+    def run(self, dry_run: bool = False, profiler: Optional[Profiler] = None) -> Optional[Dict[str, list]]:
+        profiler = profiler or Profiler()
+        system = self.job_system
+        with profiler.stage('fetch'):
+            try:
+                store = synced_store(system.AIRTABLE_BASE_ID, system.AIRTABLE_TABLE_ID, seed_records=system.fetch_jobs_from_airtable)
+                local_jobs = store.records(system.AIRTABLE_TABLE_ID)
+                jboard_jobs = system.fetch_jobs_from_jboard()
+            except requests.exceptions.RequestException as e:
+                print(f"Aborting reconcile, listing failed: {e}")
+                return None
+        print(f"Reconciling {len(local_jobs)} local jobs against {len(jboard_jobs)} Jboard jobs...")
+
+        plan = self.diff(local_jobs, jboard_jobs)
+        print(f"Plan: {len(plan['create'])} to create, {len(plan['update'])} to update, {len(plan['expire'])} to expire")
+        if dry_run:
+            return plan
+
+        with profiler.stage('apply'):
+            done = self.apply(plan)
+
+        status = {link: {"Status": "Posted"} for link in plan['posted'] + done['create']}
+        status.update({link: {"Status": "Expired"} for link in done['expire']})
+        store.update_jobs(system.AIRTABLE_TABLE_ID, status)
+        print(f"Created {len(done['create'])}, updated {len(done['update'])}, expired {len(done['expire'])} Jboard jobs")
+        return done
+
+
+def main():
+    configure()
+    parser = argparse.ArgumentParser(description="Sync Jboard with the local job set using only the needed creates, updates and expirations")
+    parser.add_argument('--dry-run', action='store_true', help="print the plan without calling Jboard")
+    parser.add_argument('--expire-unknown', action='store_true', help="also expire live Jboard jobs that aren't in the local set")
+    add_profile_args(parser)
+    args = parser.parse_args()
+    profiler = Profiler.from_args(args)
+
+    try:
+        Reconciler(expire_unknown=args.expire_unknown).run(dry_run=args.dry_run, profiler=profiler)
+    finally:
+        profiler.report()
+
+if __name__ == "__main__":
+    main()
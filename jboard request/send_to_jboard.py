@@ -1,13 +1,18 @@
+import argparse
 import pprint
 import requests
 import json
 import os
-from dotenv import load_dotenv
+import sys
 from datetime import datetime
 from typing import Dict, List, Optional
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from helpers.api_helper import custom_requests_get, custom_requests_patch, custom_requests_post
+from helpers.profiling import Profiler, add_profile_args
+from helpers.runtime import configure, synced_store
 
-load_dotenv()
+EMPLOYERS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'employers.json')
 
 class JobPostingSystem:
     def __init__(self):
@@ -25,25 +30,95 @@ class JobPostingSystem:
     def load_employer_data(self) -> Dict[str, int]:
         """Load employer data from JSON file."""
         try:
-            with open('employers.json', 'r') as f:
+            with open(EMPLOYERS_FILE, 'r') as f:
                 return json.load(f)
         except FileNotFoundError:
             print("Warning: employers.json file not found!")
             return {}
 
     def fetch_jobs_from_airtable(self) -> List[Dict]:
-        """Fetch jobs from Airtable."""
+        """
+        Fetch all jobs from Airtable, following pagination offsets.
+        Raises on any failed page, so a partial table is never used to seed the local store.
+        """
         headers = {
             'Authorization': f'Bearer {self.AIRTABLE_API_KEY}'
         }
+        records = []
+        params = {}
         
-        try:
-            response = requests.get(self.AIRTABLE_URL, headers=headers)
+        while True:
+            response = requests.get(self.AIRTABLE_URL, headers=headers, params=params)
             response.raise_for_status()
-            return response.json().get('records', [])
+            payload = response.json()
+            records.extend(payload.get('records', []))
+            if not payload.get('offset'):
+                return records
+            params['offset'] = payload['offset']
+
+    def fetch_jobs_from_jboard(self) -> List[Dict]:
+        """
+        Fetch every job currently on Jboard, one page at a time, until the last
+        page, an empty page, or a page with no job not already seen (so a server
+        that ignores `page` can't loop forever).
+        Raises on any failed page; callers diff against this list, so it must be complete.
+        """
+        headers = {
+            'Authorization': f'Bearer {self.JBOARD_API_KEY}'
+        }
+        jobs = []
+        seen_ids = set()
+        page = 1
+        
+        while True:
+            response = custom_requests_get(self.JBOARD_URL, headers=headers, params={'page': page})
+            if response.status_code != 200:
+                print(f"Error fetching jobs from Jboard page {page}: {response.status_code}")
+                response.raise_for_status()
+                raise requests.exceptions.HTTPError(f"Unexpected status {response.status_code}", response=response)
+            payload = response.json()
+            page_jobs = payload.get('data', []) if isinstance(payload, dict) else payload
+            new_jobs = [job for job in page_jobs if job.get('id') not in seen_ids]
+            seen_ids.update(job.get('id') for job in new_jobs)
+            jobs.extend(new_jobs)
+            last_page = payload.get('meta', {}).get('last_page') if isinstance(payload, dict) else None
+            if not new_jobs or (last_page is not None and page >= last_page):
+                return jobs
+            page += 1
+
+    def update_job_on_jboard(self, job_id: int, changes: Dict) -> bool:
+        """Patch only the changed fields of an existing Jboard job."""
+        headers = {
+            'Authorization': f'Bearer {self.JBOARD_API_KEY}',
+            'Content-Type': 'application/json'
+        }
+        try:
+            response = custom_requests_patch(f'{self.JBOARD_URL}/{job_id}', headers=headers, json=changes)
         except requests.exceptions.RequestException as e:
-            print(f"Error fetching from Airtable: {e}")
-            return []
+            print(f"REQUEST EXCEPTION updating Jboard job {job_id}: {e}")
+            return False
+        if response.status_code not in (200, 204):
+            print(f"ERROR: Could not update Jboard job {job_id}: {response.status_code} {response.text}")
+            return False
+        return True
+
+    def expire_job_on_jboard(self, job_id: int) -> bool:
+        """Expire a Jboard job immediately so it drops off the board."""
+        headers = {
+            'Authorization': f'Bearer {self.JBOARD_API_KEY}',
+            'Content-Type': 'application/json'
+        }
+        try:
+            response = custom_requests_patch(
+                f'{self.JBOARD_URL}/{job_id}', headers=headers, json={'job_expires_in_days': 0}
+            )
+        except requests.exceptions.RequestException as e:
+            print(f"REQUEST EXCEPTION expiring Jboard job {job_id}: {e}")
+            return False
+        if response.status_code not in (200, 204):
+            print(f"ERROR: Could not expire Jboard job {job_id}: {response.status_code} {response.text}")
+            return False
+        return True
 
     def get_employer_id(self, company_name: str) -> Optional[int]:
         """Get employer ID from the loaded employer data."""
@@ -58,7 +133,7 @@ class JobPostingSystem:
         
         try:
             print(f"\nPosting job: {job_data['title']} for {job_data['company']}")
-            response = requests.post(self.JBOARD_URL, headers=headers, json=job_data)
+            response = custom_requests_post(self.JBOARD_URL, headers=headers, json=job_data)
             
             if response.status_code != 201:
                 print(f"ERROR: Job posting failed for {job_data['title']}")
@@ -73,54 +148,90 @@ class JobPostingSystem:
             print(f"REQUEST EXCEPTION: {str(e)}")
             return None
 
-    def process_jobs(self):
-        """Process all jobs from Airtable and post them to Jboard."""
-        print("Fetching jobs from Airtable...")
-        jobs = self.fetch_jobs_from_airtable()
+    def build_job_data(self, airtable_fields: Dict, posted_at: str, pay: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        Jboard payload for an Airtable/local job, or None if it can't be posted.
+        `pay` is the job store's parsed compensation, if any.
+        """
+        company_name = airtable_fields.get("Company", "")
+        employer_id = self.get_employer_id(company_name)
+        
+        if not employer_id:
+            print(f"\nSkipping job - Unknown employer: {company_name}")
+            return None
+        
+        job_data = {
+            "title": airtable_fields.get("Title", ""),
+            "description": airtable_fields.get("Description") or airtable_fields.get("Snippet", ""),
+            "link": airtable_fields.get("Link", ""),
+            "category_id": 151223,
+            "employer_id": employer_id,
+            "posted_at": posted_at,
+            "job_expires_in_days": 30,
+            "location": "Remote",
+            "company": company_name,
+            "apply_by": "by_link",
+            "confirmation_status": "confirmed",
+            "apply_to": airtable_fields.get("Link", ""),
+            "featured": False,
+            "remote": True,
+            "pin_to_top": False,
+        }
+        if pay:
+            job_data.update({
+                "min_compensation": round(pay['min']),
+                "max_compensation": round(pay['max']),
+                "compensation_time_frame": pay['period'],
+                "compensation_currency": pay['currency'].lower(),
+            })
+        
+        if not all([job_data['title'], job_data['description'], job_data['link']]):
+            print(f"\nSkipping job with missing required fields: {job_data['title']}")
+            return None
+        return job_data
+
+    def process_jobs(self, profiler: Optional[Profiler] = None):
+        """Post every job in the local store that isn't on Jboard yet."""
+        profiler = profiler or Profiler()
+        print("Loading jobs from the local store...")
+        with profiler.stage('fetch'):
+            # Seeded from Airtable on first use; changes are synced back in the background
+            try:
+                store = synced_store(self.AIRTABLE_BASE_ID, self.AIRTABLE_TABLE_ID, seed_records=self.fetch_jobs_from_airtable)
+            except requests.exceptions.RequestException as e:
+                print(f"Error loading jobs from Airtable, nothing posted: {e}")
+                return
+            jobs = store.records(self.AIRTABLE_TABLE_ID, "status IS NULL OR status NOT IN ('Posted', 'Expired')")
         
         if not jobs:
-            print("No jobs found in Airtable.")
+            print("No unposted jobs found.")
             return
         
         print(f"Found {len(jobs)} jobs. Starting upload to Jboard...")
         current_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        for job in jobs:
-            airtable_fields = job.get('fields', {})
-            company_name = airtable_fields.get("Company", "")
-            employer_id = self.get_employer_id(company_name)
-            
-            if not employer_id:
-                print(f"\nSkipping job - Unknown employer: {company_name}")
-                continue
-            
-            job_data = {
-                "title": airtable_fields.get("Title", ""),
-                "description": airtable_fields.get("Snippet", ""),
-                "link": airtable_fields.get("Link", ""),
-                "category_id": 151223,
-                "employer_id": employer_id,
-                "posted_at": current_date,
-                "job_expires_in_days": 30,
-                "location": "Remote",
-                "company": company_name,
-                "apply_by": "by_link",
-                "confirmation_status": "confirmed",
-                "apply_to": airtable_fields.get("Link", ""),
-                "featured": False,
-                "remote": True,
-                "pin_to_top": False,
-            }
-            
-            if not all([job_data['title'], job_data['description'], job_data['link']]):
-                print(f"\nSkipping job with missing required fields: {job_data['title']}")
-                continue
-                
-            self.post_job_to_jboard(job_data)
+        posted = {}
+        with profiler.stage('post'):
+            for job in jobs:
+                job_data = self.build_job_data(job.get('fields', {}), current_date, job.get('pay'))
+                if job_data and self.post_job_to_jboard(job_data):
+                    posted[job_data['link']] = {"Status": "Posted"}
+
+        store.update_jobs(self.AIRTABLE_TABLE_ID, posted)
+        print(f"\nPosted {len(posted)} of {len(jobs)} jobs.")
 
 def main():
+    configure()
+    parser = argparse.ArgumentParser(description="Post jobs from Airtable to Jboard")
+    add_profile_args(parser)
+    args = parser.parse_args()
+    profiler = Profiler.from_args(args)
+
     job_system = JobPostingSystem()
-    job_system.process_jobs()
+    try:
+        job_system.process_jobs(profiler=profiler)
+    finally:
+        profiler.report()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
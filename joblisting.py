@@ -0,0 +1,170 @@
+"""
+Single entry point for the job listing pipeline.
+
+    python joblisting.py search [--delta]        # Google CSE -> job_listings.json
+    python joblisting.py search --sharded        # same, across all API keys and worker processes
+    python joblisting.py enrich                  # job_listings.json -> enriched_listings.json
+    python joblisting.py save [--enriched]       # listings file -> Airtable
+    python joblisting.py post                    # Airtable -> Jboard
+    python joblisting.py reconcile [--dry-run]   # diff-sync Jboard with the local set
+    python joblisting.py ats                     # ATS boards -> enriched Airtable table
+    python joblisting.py schedule [--once]       # continuous per-site refresh
+    python joblisting.py cleanup                 # expire closed postings
+
+Only the standard library is imported up front; each subcommand imports its
+own dependencies when it runs, so `--help` and short cron runs start fast.
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SEARCH_DIR = 'google search request'
+ENRICH_DIR = 'test google request'
+JBOARD_DIR = 'jboard request'
+
+logger = logging.getLogger('joblisting')
+
+
+def _load(directory, module_name):
+    """Import a pipeline script from one of the (space-named) script folders."""
+    for path in (ROOT, os.path.join(ROOT, directory)):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    return importlib.import_module(module_name)
+
+
+def _read_json(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _write_json(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=4)
+
+
+def cmd_search(args, profiler):
+    if args.sharded:
+        shards = _load(SEARCH_DIR, 'shard_executor')
+        with profiler.stage('search'):
+            job_results = shards.run_sharded_search(workers=args.workers, delta=args.delta or None)
+    else:
+        search = _load(SEARCH_DIR, 'google_search_json_api')
+        with profiler.stage('search'):
+            job_results = search.search_jobs(delta=args.delta or None)
+    logger.info(f"✨ Found {len(job_results)} job listings")
+
+
+def cmd_enrich(args, profiler):
+    enrich = _load(ENRICH_DIR, 'test_google_request')
+    with profiler.stage('enrich'):
+        job_results = enrich.enrich_jobs(_read_json(args.input))
+    _write_json(args.output, job_results)
+    logger.info(f"💾 Saved {len(job_results)} enriched listings to {args.output}")
+
+
+def cmd_save(args, profiler):
+    module = _load(ENRICH_DIR, 'test_google_request') if args.enriched else _load(SEARCH_DIR, 'google_search_json_api')
+    with profiler.stage('save'):
+        module.save_to_airtable(_read_json(args.input))
+
+
+def cmd_post(args, profiler):
+    jboard = _load(JBOARD_DIR, 'send_to_jboard')
+    jboard.JobPostingSystem().process_jobs(profiler=profiler)
+
+
+def cmd_reconcile(args, profiler):
+    reconcile = _load(JBOARD_DIR, 'reconcile')
+    reconcile.Reconciler(expire_unknown=args.expire_unknown).run(dry_run=args.dry_run, profiler=profiler)
+
+
+def cmd_ats(args, profiler):
+    ats = _load(SEARCH_DIR, 'ats_boards')
+    from helpers.runtime import save_listings
+
+    with profiler.stage('ats'):
+        job_results = ats.search_ats_boards()
+    # Same fields as enriched search results, so they share the enriched listings table
+    with profiler.stage('save'):
+        save_listings(job_results)
+
+
+def cmd_schedule(args, profiler):
+    scheduler = _load(SEARCH_DIR, 'refresh_scheduler')
+    refresh = scheduler.RefreshScheduler()
+    refresh.sync_sites(scheduler.configured_sites())
+    with profiler.stage('schedule'):
+        refresh.run_forever(once=args.once)
+
+
+def cmd_cleanup(args, profiler):
+    liveness = _load(JBOARD_DIR, 'liveness_checker')
+    with profiler.stage('cleanup'):
+        liveness.cleanup_expired_jobs()
+
+
+def build_parser():
+    from helpers.profiling import add_profile_args
+
+    parser = argparse.ArgumentParser(prog='joblisting', description="Job search and posting pipeline")
+    add_profile_args(parser)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    search = commands.add_parser('search', help="search Google CSE and write job_listings.json")
+    search.add_argument('--delta', action='store_true', help="only fetch results newer than each query's watermark")
+    search.add_argument('--sharded', action='store_true', help="split sites across all API keys and worker processes")
+    search.add_argument('--workers', type=int, default=None, help="worker processes for --sharded (default: $SHARD_WORKERS or CPU count)")
+    search.set_defaults(handler=cmd_search)
+
+    enrich = commands.add_parser('enrich', help="fetch full descriptions and extract compensation/location")
+    enrich.add_argument('--input', default='job_listings.json')
+    enrich.add_argument('--output', default='enriched_listings.json')
+    enrich.set_defaults(handler=cmd_enrich)
+
+    save = commands.add_parser('save', help="save a listings file to Airtable")
+    save.add_argument('--input', default='job_listings.json')
+    save.add_argument('--enriched', action='store_true', help="save to the enriched listings table")
+    save.set_defaults(handler=cmd_save)
+
+    post = commands.add_parser('post', help="post Airtable jobs to Jboard")
+    post.set_defaults(handler=cmd_post)
+
+    reconcile = commands.add_parser('reconcile', help="create, update and expire Jboard jobs to match the local set")
+    reconcile.add_argument('--dry-run', action='store_true', help="print the plan without calling Jboard")
+    reconcile.add_argument('--expire-unknown', action='store_true', help="also expire live Jboard jobs that aren't in the local set")
+    reconcile.set_defaults(handler=cmd_reconcile)
+
+    ats = commands.add_parser('ats', help="pull postings from employers' ATS boards into the enriched Airtable table")
+    ats.set_defaults(handler=cmd_ats)
+
+    schedule = commands.add_parser('schedule', help="run the yield-driven refresh scheduler")
+    schedule.add_argument('--once', action='store_true', help="run every due site once and exit")
+    schedule.set_defaults(handler=cmd_schedule)
+
+    cleanup = commands.add_parser('cleanup', help="expire closed postings on Jboard and Airtable")
+    cleanup.set_defaults(handler=cmd_cleanup)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    from helpers.runtime import configure
+    from helpers.profiling import Profiler
+
+    configure()
+    profiler = Profiler.from_args(args)
+    try:
+        args.handler(args, profiler)
+    finally:
+        profiler.report()
+
+
+if __name__ == "__main__":
+    main()
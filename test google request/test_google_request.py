@@ -1,8 +1,7 @@
+import argparse
 import time
 import logging
 #import os
-from dotenv import load_dotenv
-from pyairtable import Api
 #from ..helpers.api_helper import custom_requests_get
 import json
 
@@ -10,23 +9,84 @@ import sys
 import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from helpers.api_helper import custom_requests_get
+from helpers.api_helper import custom_requests_get, DEFAULT_LIMITER
+from helpers.profiling import Profiler, add_profile_args
+from helpers.runtime import configure, save_listings, ENRICHED_BASE_ID, ENRICHED_TABLE_ID
 from helpers.validation import fetch_full_description, extract_compensation, extract_location 
+from helpers.relevance import RelevanceFilter
 
-api = Api(os.getenv('AIR_TABLE_API', 'default_value'))
-table = api.table('app816KaoBp3EZKwg','tbla1yH8WjUmcrqYf')
+AIRTABLE_BASE_ID = ENRICHED_BASE_ID
+AIRTABLE_TABLE_ID = ENRICHED_TABLE_ID
 
-load_dotenv()
-
-logging.basicConfig(
-    level=getattr(logging, os.getenv('LOG_LEVEL', 'INFO')),
-    format='%(asctime)s - %(message)s',
-    datefmt='%H:%M:%S'
-)
 logger = logging.getLogger(__name__)
 
 
 
+class EnrichmentBudget:
+    """Overall enrichment deadline; past it, remaining items keep their search snippet."""
+
+    def __init__(self):
+        self.budget = float(os.getenv('ENRICH_DEADLINE_SECONDS', 900))
+        self.deadline = time.monotonic() + self.budget
+        self.fetch_timeout = float(os.getenv('FETCH_TIMEOUT_SECONDS', 10))
+        self.hedge_percentile = float(os.getenv('FETCH_HEDGE_PERCENTILE', 0)) or None
+        self._deadline_logged = False
+
+    def next_timeout(self):
+        """Timeout for the next page fetch, or None once the deadline has passed."""
+        remaining = self.deadline - time.monotonic()
+        if remaining > 0:
+            return min(self.fetch_timeout, remaining)
+        if not self._deadline_logged:
+            logger.warning(f"⏱️ Enrichment deadline of {self.budget}s reached, using snippets")
+            self._deadline_logged = True
+        return None
+
+
+def enrich_job(item, budget):
+    """Build the Airtable record for one CSE item, fetching its full description while the budget lasts."""
+    link = item.get('link', '')
+
+    # Combine title and snippet for better text analysis
+    full_text = f"{item.get('title', '')} {item.get('snippet', '')}"
+
+    timeout = budget.next_timeout()
+    description = None
+    if timeout:
+        description = fetch_full_description(link, timeout=timeout, hedge_percentile=budget.hedge_percentile)
+    description = description or item.get('snippet', 'N/A')
+
+    # Extract compensation and location
+    compensation = extract_compensation(full_text) or extract_compensation(description) or 'N/A'
+    location = extract_location(full_text) or extract_location(description) or 'N/A'
+
+    # Determine compensation currency
+    currency = 'USD' if '$' in compensation else 'N/A'
+
+    return {
+        "Title": item.get('title', 'N/A'),
+        "Link": link,
+        "Company": item.get('snippet', 'N/A').split('\n')[0],
+        "Location": location,
+        "Description": description,
+        "Compensation": compensation,
+        "Compensation Currency": currency
+    }
+
+
+def enrich_jobs(items):
+    """Enrich already-collected search items (CSE items or job_listings.json records)."""
+    budget = EnrichmentBudget()
+    relevance = RelevanceFilter(os.getenv('JOB_ROLES', '').split(','), os.getenv('LOCATIONS', '').split(','))
+    # job_listings.json uses the Airtable field names
+    items = [{key.lower(): value for key, value in item.items()} for item in items]
+    items, rejected = relevance.split([item for item in items if item.get('link')])
+
+    job_results = [enrich_job(item, budget) for item in items]
+    logger.info(f"📊 Enriched {len(job_results)} job results, skipped {len(rejected)} irrelevant")
+    return job_results
+
+
 def search_jobs(api_key=None, search_engine_id=None, max_results=400):
     api_key = api_key or os.getenv('GOOGLE_API_KEY')
     search_engine_id = search_engine_id or os.getenv('GOOGLE_SEARCH_ENGINE_ID')
@@ -42,6 +102,12 @@ def search_jobs(api_key=None, search_engine_id=None, max_results=400):
     
     job_results = []
     unique_links = set()
+
+    budget = EnrichmentBudget()
+
+    # Items whose title/snippet clearly miss the configured roles/locations never get a page fetch
+    relevance = RelevanceFilter(roles, locations)
+    skipped_irrelevant = 0
     
     for site in job_sites_combined:
         site = site.strip()
@@ -76,6 +142,9 @@ def search_jobs(api_key=None, search_engine_id=None, max_results=400):
             
             if not items:
                 break
+
+            items, rejected = relevance.split(items)
+            skipped_irrelevant += len(rejected)
             
             for item in items:
                 link = item.get('link', '')
@@ -84,29 +153,7 @@ def search_jobs(api_key=None, search_engine_id=None, max_results=400):
                     continue
                 
                 unique_links.add(link)
-                
-                # Combine title and snippet for better text analysis
-                full_text = f"{item.get('title', '')} {item.get('snippet', '')}"
-                
-                # Get full description
-                description = fetch_full_description(link) or item.get('snippet', 'N/A')
-                
-                # Extract compensation and location
-                compensation = extract_compensation(full_text) or extract_compensation(description) or 'N/A'
-                location = extract_location(full_text) or extract_location(description) or 'N/A'
-                
-                # Determine compensation currency
-                currency = 'USD' if '$' in compensation else 'N/A'
-                
-                job_results.append({
-                    "Title": item.get('title', 'N/A'),
-                    "Link": link,
-                    "Company": item.get('snippet', 'N/A').split('\n')[0], 
-                    "Location": location,
-                    "Description": description,
-                    "Compensation": compensation,
-                    "Compensation Currency": currency
-                })
+                job_results.append(enrich_job(item, budget))
                 
                 if len(job_results) >= max_results:
                     logger.info(f"✅ Reached maximum results limit: {max_results}")
@@ -121,38 +168,34 @@ def search_jobs(api_key=None, search_engine_id=None, max_results=400):
     #     json.dump(job_results, f, indent=4)
 
     logger.info(f"📊 Total unique job results found: {len(job_results)}")
+    logger.info(f"🚫 Skipped {skipped_irrelevant} irrelevant results before enrichment")
     # logger.info(f"💾 Saved results to {file_path}")
     return job_results
 
 
 def save_to_airtable(data):
-    try:
-        existing_records = table.all()
-        existing_links = {record['fields'].get('Link') for record in existing_records}
-        
-        new_jobs = [job for job in data if job['Link'] not in existing_links]
-        
-        if new_jobs:
-            chunk_size = 10
-            for i in range(0, len(new_jobs), chunk_size):
-                chunk = new_jobs[i:i + chunk_size]
-                table.batch_create(chunk)
-                time.sleep(0.5)
-            logger.info(f"✅ Saved {len(new_jobs)} new job listings to Airtable")
-        else:
-            logger.info("ℹ️ No new job listings to save")
-            
-    except Exception as e:
-        logger.error(f"❌ Error saving to Airtable: {e}")
+    """Add new jobs to the local store; the background sync pushes them to Airtable. Returns whether they were stored."""
+    return save_listings(data, AIRTABLE_BASE_ID, AIRTABLE_TABLE_ID)
 
 def main():
+    configure()
+    parser = argparse.ArgumentParser(description="Search for job listings and save them to Airtable")
+    add_profile_args(parser)
+    args = parser.parse_args()
+    profiler = Profiler.from_args(args)
+
     try:
         logger.info("🚀 Starting job search...")
-        job_results = search_jobs()
-        save_to_airtable(job_results)
+        with profiler.stage('search'):
+            job_results = search_jobs()
+        with profiler.stage('save'):
+            save_to_airtable(job_results)
         logger.info(f"✨ Completed! Found {len(job_results)} unique job listings")
+        DEFAULT_LIMITER.log_metrics()
     except Exception as e:
         logger.error(f"❌ Error in main execution: {e}")
+    finally:
+        profiler.report()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,96 @@
+import json
+import math
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from helpers.compensation import normalize_compensation, rate_table
+
+# text -> (min, max, period, currency, annual_min_usd, annual_max_usd)
+CASES = {
+    '$120,000 - $150,000 per year': (120000, 150000, 'annually', 'USD', 120000, 150000),
+    '$50-70k': (50000, 70000, 'annually', 'USD', 50000, 70000),
+    '100k-120k USD': (100000, 120000, 'annually', 'USD', 100000, 120000),
+    'Salary: 85000': (85000, 85000, 'annually', 'USD', 85000, 85000),
+    '$45/hr': (45, 45, 'hourly', 'USD', 93600, 93600),
+    '$25 - $30 an hour': (25, 30, 'hourly', 'USD', 52000, 62400),
+    '45 per hour': (45, 45, 'hourly', 'USD', 93600, 93600),
+    '60 hourly': (60, 60, 'hourly', 'USD', 124800, 124800),
+    '$4,000/month': (4000, 4000, 'monthly', 'USD', 48000, 48000),
+    '€60k–80k': (60000, 80000, 'annually', 'EUR', 60000 / 0.92, 80000 / 0.92),
+    '£3,000 per month': (3000, 3000, 'monthly', 'GBP', 36000 / 0.79, 36000 / 0.79),
+    'CAD 90,000 - 110,000 annually': (90000, 110000, 'annually', 'CAD', 90000 / 1.36, 110000 / 1.36),
+    '$90,000 - $110,000 with 401(k)': (90000, 110000, 'annually', 'USD', 90000, 110000),
+}
+
+NOISE = [
+    '401k matching, 5 years experience',
+    '3 year contract, 40 hour week',
+    '12-month contract',
+    'competitive',
+    'N/A',
+    None,
+    '',
+]
+
+
+class NormalizeCompensationTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(os.environ, {}, clear=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        os.environ.pop('EXCHANGE_RATES_FILE', None)
+        rate_table.cache_clear()
+        self.addCleanup(rate_table.cache_clear)
+
+    def test_parses_ranges_periods_and_currencies(self):
+        texts = list(CASES)
+        result = normalize_compensation(texts)
+        for i, text in enumerate(texts):
+            low, high, period, currency, annual_low, annual_high = CASES[text]
+            with self.subTest(text=text):
+                self.assertEqual(result['min'][i], low)
+                self.assertEqual(result['max'][i], high)
+                self.assertEqual(result['period'][i], period)
+                self.assertEqual(result['currency'][i], currency)
+                self.assertAlmostEqual(result['annual_min_usd'][i], annual_low, places=2)
+                self.assertAlmostEqual(result['annual_max_usd'][i], annual_high, places=2)
+
+    def test_noise_is_not_pay(self):
+        result = normalize_compensation(NOISE)
+        for i, text in enumerate(NOISE):
+            with self.subTest(text=text):
+                self.assertTrue(math.isnan(result['min'][i]))
+                self.assertTrue(math.isnan(result['annual_max_usd'][i]))
+                self.assertEqual(result['period'][i], '')
+                self.assertEqual(result['currency'][i], '')
+
+    def test_records_in_a_batch_stay_separate(self):
+        result = normalize_compensation(['$50,000', '60,000 per year', 'no pay listed'])
+        self.assertEqual(list(result['min'][:2]), [50000, 60000])
+        self.assertEqual(list(result['max'][:2]), [50000, 60000])
+        self.assertTrue(math.isnan(result['min'][2]))
+
+    def test_currency_hint_fills_in_missing_symbol(self):
+        result = normalize_compensation(['90,000 - 110,000', '$90,000', '90,000'], ['GBP', 'GBP', 'XYZ'])
+        self.assertEqual(list(result['currency']), ['GBP', 'USD', 'USD'])
+
+    def test_empty_batch(self):
+        result = normalize_compensation([])
+        self.assertEqual(len(result['min']), 0)
+        self.assertEqual(len(result['period']), 0)
+
+    def test_exchange_rate_file_overrides_defaults(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'rates.json')
+            with open(path, 'w') as f:
+                json.dump({'eur': 0.5}, f)
+            os.environ['EXCHANGE_RATES_FILE'] = path
+            rate_table.cache_clear()
+            result = normalize_compensation(['€50k'])
+        self.assertAlmostEqual(result['annual_min_usd'][0], 100000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'jboard request'))
+import send_to_jboard
+from reconcile import Reconciler, _jboard_expired
+from send_to_jboard import JobPostingSystem
+
+DESCRIPTION = "Build and run the data platform."
+
+
+def local_job(link, status=None, company='Acme', pay=None, **fields):
+    record = {'id': None, 'fields': {'Link': link, 'Title': 'Engineer', 'Company': company,
+                                     'Description': DESCRIPTION, **fields}}
+    if status:
+        record['fields']['Status'] = status
+    if pay:
+        record['pay'] = pay
+    return record
+
+
+def jboard_job(job_id, link, **fields):
+    return {'id': job_id, 'apply_to': link, 'title': 'Engineer', 'description': f"<p>{DESCRIPTION}</p>", **fields}
+
+
+class ReconcilerDiffTest(unittest.TestCase):
+    def setUp(self):
+        system = JobPostingSystem()
+        system.employers = {'Acme': 1}
+        self.reconciler = Reconciler(job_system=system)
+
+    def diff(self, local_jobs, jboard_jobs):
+        with mock.patch('builtins.print'):
+            return self.reconciler.diff(local_jobs, jboard_jobs)
+
+    def test_missing_job_is_created(self):
+        plan = self.diff([local_job('https://a')], [])
+        self.assertEqual([job['link'] for job in plan['create']], ['https://a'])
+        self.assertEqual(plan['update'], [])
+        self.assertEqual(plan['expire'], [])
+
+    def test_unknown_employer_is_not_created(self):
+        plan = self.diff([local_job('https://a', company='Unknown Co')], [])
+        self.assertEqual(plan['create'], [])
+
+    def test_unchanged_job_needs_no_call(self):
+        plan = self.diff([local_job('https://a', status='Posted')], [jboard_job(7, 'https://a')])
+        self.assertEqual(plan, {'create': [], 'update': [], 'expire': [], 'posted': []})
+
+    def test_job_on_jboard_is_marked_posted_locally(self):
+        plan = self.diff([local_job('https://a')], [jboard_job(7, 'https://a')])
+        self.assertEqual(plan['posted'], ['https://a'])
+        self.assertEqual(plan['create'], [])
+
+    def test_update_carries_only_changed_fields(self):
+        pay = {'min': 100000, 'max': 120000, 'period': 'annually', 'currency': 'USD'}
+        jboard = jboard_job(7, 'https://a', title='Old title', min_compensation=100000.0, max_compensation=120000,
+                            compensation_currency='usd', compensation_time_frame='annually')
+        plan = self.diff([local_job('https://a', status='Posted', pay=pay)], [jboard])
+        self.assertEqual(plan['update'], [(7, 'https://a', {'title': 'Engineer'})])
+
+    def test_locally_expired_job_is_expired_on_jboard(self):
+        plan = self.diff([local_job('https://a', status='Expired')], [jboard_job(7, 'https://a')])
+        self.assertEqual(plan['expire'], [(7, 'https://a')])
+        self.assertEqual(plan['create'], [])
+
+    def test_already_expired_jboard_job_is_left_alone(self):
+        past = (datetime.now(timezone.utc) - timedelta(minutes=5)).isoformat()
+        plan = self.diff([local_job('https://a', status='Expired')], [jboard_job(7, 'https://a', expires_at=past)])
+        self.assertEqual(plan['expire'], [])
+
+    def test_unknown_jboard_jobs_are_only_expired_when_asked(self):
+        jboard = [jboard_job(7, 'https://hand-posted')]
+        self.assertEqual(self.diff([], jboard)['expire'], [])
+        self.reconciler.expire_unknown = True
+        self.assertEqual(self.diff([], jboard)['expire'], [(7, 'https://hand-posted')])
+
+
+class JboardExpiredTest(unittest.TestCase):
+    def test_compares_in_utc(self):
+        now = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+        self.assertTrue(_jboard_expired({'expires_at': '2024-05-01T11:59:00Z'}, now))
+        self.assertFalse(_jboard_expired({'expires_at': '2024-05-01T12:01:00+00:00'}, now))
+        self.assertFalse(_jboard_expired({'expires_at': '2024-05-01T13:30:00+02:00'}, now - timedelta(hours=1)))
+        self.assertTrue(_jboard_expired({'expires_at': '2024-05-01 11:00:00'}, now))
+
+    def test_missing_or_bad_timestamp_is_live(self):
+        now = datetime.now(timezone.utc)
+        self.assertFalse(_jboard_expired({}, now))
+        self.assertFalse(_jboard_expired({'expires_at': 'soon'}, now))
+
+
+class FetchJobsFromJboardTest(unittest.TestCase):
+    def fetch(self, pages):
+        def fake_get(url, headers=None, params=None):
+            response = mock.Mock(status_code=200)
+            response.json.return_value = pages(params['page'])
+            return response
+
+        with mock.patch.object(send_to_jboard, 'custom_requests_get', side_effect=fake_get) as get:
+            jobs = JobPostingSystem().fetch_jobs_from_jboard()
+        return jobs, get.call_count
+
+    def test_follows_meta_last_page(self):
+        jobs, calls = self.fetch(lambda page: {'data': [{'id': page}], 'meta': {'last_page': 3}})
+        self.assertEqual([job['id'] for job in jobs], [1, 2, 3])
+        self.assertEqual(calls, 3)
+
+    def test_stops_when_server_ignores_page(self):
+        jobs, calls = self.fetch(lambda page: [{'id': 1}, {'id': 2}])
+        self.assertEqual([job['id'] for job in jobs], [1, 2])
+        self.assertEqual(calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
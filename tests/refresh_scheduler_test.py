@@ -0,0 +1,114 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'google search request'))
+import refresh_scheduler
+from refresh_scheduler import HOUR, RefreshScheduler
+
+SCHEDULER_ENV = {
+    'TARGET_NEW_PER_RUN': '5',
+    'MIN_REFRESH_HOURS': '1',
+    'MAX_REFRESH_HOURS': str(14 * 24),
+    'INITIAL_REFRESH_HOURS': '24',
+    'DAILY_QUERY_QUOTA': '100',
+}
+
+
+class RefreshSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        with mock.patch.dict(os.environ, SCHEDULER_ENV):
+            self.scheduler = RefreshScheduler(os.path.join(self.tmp.name, 'scheduler.db'))
+        self.addCleanup(self.scheduler.conn.close)
+        self.scheduler.sync_sites(['example.com'])
+
+    def row(self):
+        return self.scheduler.conn.execute("SELECT * FROM refresh_queue WHERE site = 'example.com'").fetchone()
+
+    def refresh(self, jobs=(), saved=True, **stats):
+        """Run the due site once against a fake search that returns `jobs` and fills in `stats`."""
+        def fake_search(stats=None, **kwargs):
+            self.search_kwargs = kwargs
+            stats.update({'queries': 1, **extra})
+            return list(jobs)
+
+        extra = stats
+        self.watermarks = mock.Mock()
+        with mock.patch.object(refresh_scheduler, 'search_jobs', side_effect=fake_search), \
+                mock.patch.object(refresh_scheduler, 'save_to_airtable', return_value=saved), \
+                mock.patch.object(refresh_scheduler, 'WatermarkStore', return_value=self.watermarks):
+            self.scheduler.run_task(self.row())
+        return self.row()
+
+    def test_hot_site_interval_is_target_over_rate(self):
+        self.assertEqual(self.scheduler.derive_interval(1.0, 24 * HOUR), 5 * HOUR)
+        self.assertEqual(self.scheduler.derive_interval(2.5, 24 * HOUR), 2 * HOUR)
+
+    def test_very_hot_site_is_clamped_to_min_interval(self):
+        self.assertEqual(self.scheduler.derive_interval(100.0, 24 * HOUR), 1 * HOUR)
+
+    def test_cold_site_is_clamped_to_max_interval(self):
+        self.assertEqual(self.scheduler.derive_interval(0.01, 24 * HOUR), 14 * 24 * HOUR)
+
+    def test_zero_yield_backs_off_gradually(self):
+        self.assertEqual(self.scheduler.derive_interval(0, 24 * HOUR), 48 * HOUR)
+        self.assertEqual(self.scheduler.derive_interval(None, 10 * 24 * HOUR), 14 * 24 * HOUR)
+
+    def test_refresh_does_not_overwrite_job_listings_file(self):
+        self.refresh()
+        self.assertIsNone(self.search_kwargs['output_file'])
+
+    def test_first_run_records_baseline_without_rate(self):
+        row = self.refresh(jobs=[{'Link': f'https://example.com/{i}'} for i in range(100)])
+        self.assertIsNone(row['rate_ewma'])
+        self.assertIsNone(row['avg_queries'])
+        self.assertEqual(row['runs'], 1)
+        self.assertEqual(row['last_new'], 100)
+        self.assertAlmostEqual(row['next_run'] - row['last_run'], 24 * HOUR)
+
+    def test_later_run_updates_rate(self):
+        self.refresh()
+        with self.scheduler.conn:
+            self.scheduler.conn.execute("UPDATE refresh_queue SET last_run = last_run - ?, next_run = 0", (10 * HOUR,))
+        row = self.refresh(jobs=[{'Link': f'https://example.com/{i}'} for i in range(10)])
+        self.assertAlmostEqual(row['rate_ewma'], 1.0, places=2)
+        self.assertAlmostEqual(row['interval'], 5 * HOUR, delta=60)
+
+    def test_daily_quota_error_pauses_until_tomorrow(self):
+        before = self.row()
+        row = self.refresh(quota_error='daily', http_error=403)
+        self.assertEqual(self.scheduler.quota_left(), 0)
+        self.assertIsNone(self.scheduler.next_task())
+        self.assertEqual(row['next_run'], before['next_run'])
+        self.assertIsNone(row['rate_ewma'])
+        self.assertIsNone(row['avg_queries'])
+        self.assertEqual(row['runs'], 0)
+
+    def test_watermarks_are_saved_after_the_results(self):
+        self.refresh(jobs=[{'Link': 'https://example.com/1'}])
+        self.assertIs(self.search_kwargs['watermarks'], self.watermarks)
+        self.watermarks.save.assert_called_once()
+
+    def test_failed_save_keeps_watermarks_and_history(self):
+        row = self.refresh(jobs=[{'Link': 'https://example.com/1'}], saved=False)
+        self.watermarks.save.assert_not_called()
+        self.assertIsNone(row['last_run'])
+        self.assertEqual(row['runs'], 0)
+
+    def test_http_error_retries_without_touching_history(self):
+        started = time.time()
+        row = self.refresh(http_error=503)
+        self.assertIsNone(row['rate_ewma'])
+        self.assertIsNone(row['last_run'])
+        self.assertEqual(row['interval'], 24 * HOUR)
+        self.assertGreaterEqual(row['next_run'], started + HOUR)
+        self.assertEqual(self.scheduler.quota_left(), 99)
+
+
+if __name__ == '__main__':
+    unittest.main()